@@ -0,0 +1,187 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import httpx
+from jose import jwt, JWTError
+
+# Azure AD signing keys; {tenant_id} is substituted
+DEFAULT_JWKS_URL = "https://login.microsoftonline.com/{tenant_id}/discovery/v2.0/keys"
+DEFAULT_JWKS_CACHE_TTL = 3600
+DEFAULT_TOKEN_CACHE_SIZE = 1024
+# An unknown kid forces a JWKS refetch at most this often (key rotation)
+MIN_JWKS_REFETCH_INTERVAL = 30
+
+
+class InvalidToken(Exception):
+    """Raised when a bearer token can't be verified."""
+
+
+class JWKSCache:
+    """
+    Signing keys of the identity provider, fetched once and kept for `ttl`
+    seconds. A background thread refetches them before they expire, and a
+    token signed with an unknown kid triggers an early (rate-limited)
+    refetch to pick up rotated keys.
+
+    `fetcher` returns the JWKS document ({"keys": [...]}); pass one that
+    returns locally generated keys to test without an identity provider.
+    """
+
+    def __init__(self, jwks_url: str = None, ttl: float = DEFAULT_JWKS_CACHE_TTL,
+                 fetcher: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self._fetcher = fetcher or self._fetch_from_url
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    def _fetch_from_url(self) -> Dict[str, Any]:
+        response = httpx.get(self.jwks_url, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def _refresh(self):
+        document = self._fetcher()
+        keys = {key.get("kid"): key for key in document.get("keys", [])}
+        with self._lock:
+            self._keys = keys
+            self._expires_at = time.monotonic() + self.ttl
+            self._last_fetch = time.monotonic()
+            self.fetches += 1
+        print(f"[AUTH] Loaded {len(keys)} signing keys")
+
+    def get_key(self, kid: str) -> Dict[str, Any]:
+        with self._lock:
+            key = self._keys.get(kid)
+            fresh = self._expires_at > time.monotonic()
+            may_refetch = time.monotonic() - self._last_fetch >= MIN_JWKS_REFETCH_INTERVAL
+        if key is not None and fresh:
+            return key
+        if key is None and fresh and not may_refetch:
+            raise InvalidToken(f"Unknown signing key: {kid}")
+        try:
+            self._refresh()
+        except Exception as e:
+            with self._lock:
+                self.fetch_errors += 1
+            # Keep verifying with the keys we have if the provider is unreachable
+            print(f"[AUTH] Could not fetch signing keys: {e}")
+            if key is not None:
+                return key
+            raise InvalidToken("Signing keys unavailable")
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            raise InvalidToken(f"Unknown signing key: {kid}")
+        return key
+
+    def start_background_refresh(self):
+        if self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self._lock:
+                # Refresh at 90% of the TTL so requests never wait on a fetch
+                wait = self._expires_at - time.monotonic() - self.ttl * 0.1 if self._keys else 0
+            if self._stop.wait(max(wait, 1.0) if self._keys else 0):
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                with self._lock:
+                    self.fetch_errors += 1
+                print(f"[AUTH] Background JWKS refresh failed: {e}")
+                if self._stop.wait(30):
+                    return
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "jwks_url": self.jwks_url,
+                "keys": len(self._keys),
+                "fetches": self.fetches,
+                "fetch_errors": self.fetch_errors,
+                "expires_in_seconds": max(0, int(self._expires_at - time.monotonic())) if self._keys else None,
+            }
+
+
+class TokenValidator:
+    """
+    Verifies bearer tokens against a JWKSCache and remembers the claims of
+    verified tokens in a bounded LRU until each token's `exp`, so a token
+    that is presented on every request is only verified once.
+    """
+
+    def __init__(self, jwks: JWKSCache, audience: str = None, issuer: str = None,
+                 algorithms=("RS256",), max_cached_tokens: int = DEFAULT_TOKEN_CACHE_SIZE):
+        self.jwks = jwks
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = list(algorithms)
+        self.max_cached_tokens = max_cached_tokens
+        self._lock = threading.Lock()
+        # sha256(token) -> (claims, exp)
+        self._verified: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def validate(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise InvalidToken."""
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._verified.get(digest)
+            if entry is not None:
+                if entry[1] > now:
+                    self._verified.move_to_end(digest)
+                    self.hits += 1
+                    return entry[0]
+                del self._verified[digest]
+            self.misses += 1
+        try:
+            header = jwt.get_unverified_header(token)
+            key = self.jwks.get_key(header.get("kid"))
+            claims = jwt.decode(
+                token, key, algorithms=self.algorithms,
+                audience=self.audience, issuer=self.issuer,
+                options={"verify_aud": self.audience is not None, "verify_iss": self.issuer is not None},
+            )
+        except (JWTError, InvalidToken) as e:
+            with self._lock:
+                self.rejected += 1
+            raise InvalidToken(str(e))
+        if "exp" not in claims:
+            with self._lock:
+                self.rejected += 1
+            raise InvalidToken("Token has no expiry")
+        with self._lock:
+            self._verified[digest] = (claims, float(claims["exp"]))
+            while len(self._verified) > self.max_cached_tokens:
+                self._verified.popitem(last=False)
+        return claims
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_tokens": len(self._verified),
+                "max_cached_tokens": self.max_cached_tokens,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "jwks": self.jwks.stats(),
+            }
@@ -1,15 +1,140 @@
 from fastapi import Depends, HTTPException, status, Header
 import os
+import threading
+import time
 from typing import Dict, Optional
+from sqlalchemy import text
+from backend.app.auth.jwt_validator import (
+    DEFAULT_JWKS_CACHE_TTL, DEFAULT_JWKS_URL, DEFAULT_TOKEN_CACHE_SIZE,
+    InvalidToken, JWKSCache, TokenValidator
+)
+from backend.database.connection import get_env, get_engine
+from backend.database.write_events import register_write_listener
 
-async def get_current_user(authorization: Optional[str] = Header(None)) -> Dict[str, any]:
+# Seconds a claims -> users row mapping (including "no such user") is cached
+DEFAULT_USER_CACHE_TTL = 300
+
+# Claims that may carry the user's email, in order of preference
+EMAIL_CLAIMS = ("email", "preferred_username", "upn")
+
+DEV_USER = {
+    "id": 999,
+    "name": "Development User",
+    "email": "dev@example.com"
+}
+
+
+class UserLookupCache:
+    """Cached lookup of rows in the users table by email."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        return float(get_env('USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL))
+
+    def get(self, email: str) -> Optional[Dict[str, any]]:
+        key = email.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with get_engine().connect() as connection:
+            row = connection.execute(
+                text("SELECT id, name, email FROM users WHERE LOWER(email) = :email"),
+                {"email": key}
+            ).first()
+        user = {"id": row.id, "name": row.name, "email": row.email} if row else None
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+        return user
+
+    def invalidate(self, table_name: str = None):
+        """Drop cached lookups; as a write listener, only for writes to the users table."""
+        if table_name is not None and table_name.lower() != "users":
+            return
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserLookupCache()
+register_write_listener(user_cache.invalidate)
+
+_validator: Optional[TokenValidator] = None
+_validator_lock = threading.Lock()
+
+
+def auth_enabled() -> bool:
+    """AUTH_MODE=jwt turns on bearer token validation; the default keeps the development user."""
+    return (get_env('AUTH_MODE', 'dev') or '').lower() == 'jwt'
+
+
+def get_token_validator() -> TokenValidator:
+    """Build the process-wide validator from the AUTH_* settings on first use."""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                jwks_url = (get_env('AUTH_JWKS_URL') or DEFAULT_JWKS_URL).format(
+                    tenant_id=get_env('AZURE_TENANT_ID') or '')
+                jwks = JWKSCache(jwks_url, ttl=float(get_env('JWKS_CACHE_TTL', DEFAULT_JWKS_CACHE_TTL)))
+                jwks.start_background_refresh()
+                _validator = TokenValidator(
+                    jwks,
+                    audience=get_env('AUTH_AUDIENCE'),
+                    issuer=get_env('AUTH_ISSUER'),
+                    max_cached_tokens=int(get_env('TOKEN_CACHE_SIZE', DEFAULT_TOKEN_CACHE_SIZE)),
+                )
+    return _validator
+
+
+def set_token_validator(validator: Optional[TokenValidator]):
+    """Replace the validator, e.g. with one backed by locally generated keys."""
+    global _validator
+    with _validator_lock:
+        if _validator is not None and _validator is not validator:
+            _validator.jwks.stop()
+        _validator = validator
+
+
+def get_current_user(authorization: Optional[str] = Header(None)) -> Dict[str, any]:
     """
-    Simplified authentication that always returns a superuser with full access.
-    This bypasses the need for complex token validation while keeping the API structure intact.
+    Resolve the calling user. Without AUTH_MODE=jwt this returns the
+    development superuser (ID 999, full access per check_table_access).
+
+    With AUTH_MODE=jwt the bearer token is verified (cached until it expires)
+    and its email claim is mapped onto the users table (cached lookup).
     """
-    # Simply return a user with ID 999, which has full access to all tables per check_table_access
-    return {
-        "id": 999, 
-        "name": "Development User",
-        "email": "dev@example.com"
-    }
+    if not auth_enabled():
+        return dict(DEV_USER)
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing bearer token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    try:
+        claims = get_token_validator().validate(authorization[7:].strip())
+    except InvalidToken as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token: {e}",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    email = next((claims[claim] for claim in EMAIL_CLAIMS if claims.get(claim)), None)
+    if not email:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token has no email claim")
+    user = user_cache.get(email)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"User {email} is not registered")
+    return user
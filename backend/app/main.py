@@ -4,11 +4,22 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from backend.app.auth.token import get_current_user
 from backend.app.routers import tables, data, debug, settings
-from backend.database.connection import Base
+from backend.database.connection import Base, get_threadpool_size
+from contextlib import asynccontextmanager
+from anyio import to_thread
 import os
 
 
-app = FastAPI(title="Data Entry API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Route handlers that use pyodbc are plain `def` functions, so FastAPI runs
+    # them in anyio's worker threadpool instead of on the event loop. Size that
+    # pool to the DB connection pool so blocked threads never outnumber connections.
+    to_thread.current_default_thread_limiter().total_tokens = get_threadpool_size()
+    yield
+
+
+app = FastAPI(title="Data Entry API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -17,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Include routers
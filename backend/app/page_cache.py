@@ -0,0 +1,182 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from backend.database.connection import get_env, database_key
+from backend.database.read_replica import DEFAULT_READ_YOUR_WRITES_SECONDS
+from backend.database.write_events import register_write_listener
+
+# Default memory cap (bytes of cached JSON bodies) and entry lifetime (seconds)
+DEFAULT_PAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_PAGE_CACHE_TTL = 60
+
+
+class CachedPage:
+    def __init__(self, table_name: str, body: bytes, expires_at: float):
+        self.table_name = table_name
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.expires_at = expires_at
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def page_response(request: Request, page: CachedPage) -> Response:
+    """200 with the cached body, or 304 if the client already has this ETag."""
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+
+class PageCache:
+    """
+    Bounded LRU of serialized GET responses (table pages and metadata), so a
+    refresh of an unchanged page skips SQL Server and a conditional GET with
+    a matching If-None-Match gets a 304.
+
+    The total size of cached bodies is capped at PAGE_CACHE_MAX_BYTES; the
+    least recently used pages are evicted first. Entries expire after
+    PAGE_CACHE_TTL seconds (writes made outside this process aren't seen),
+    and every entry of a table is dropped as soon as a write to it is
+    reported through write_events.
+
+    Pages are keyed by the database key of the engine that served them, so
+    read replica pages never reach users whose reads are pinned to the
+    primary. Replica reads of a table written in the last
+    READ_YOUR_WRITES_SECONDS aren't stored at all, since the replica may not
+    have caught up with the write yet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        # Bumped on every write so a page read before the write is never stored after it
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        # When each table (None: any table) was last written, for the replica lag check
+        self._written_at: Dict[Optional[str], float] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.replica_skips = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return int(get_env('PAGE_CACHE_MAX_BYTES', DEFAULT_PAGE_CACHE_MAX_BYTES))
+
+    @property
+    def ttl(self) -> float:
+        return float(get_env('PAGE_CACHE_TTL', DEFAULT_PAGE_CACHE_TTL))
+
+    @staticmethod
+    def key(bind, kind: str, table_name: str, request: Request, version: Hashable = None) -> tuple:
+        """
+        Cache key of a response. `version` separates otherwise identical
+        requests, e.g. metadata pages are keyed on the catalog load time so a
+        schema reload never serves metadata built from the previous catalog.
+        """
+        return (kind, database_key(bind), table_name, tuple(sorted(request.query_params.multi_items())), version)
+
+    def generation(self, table_name: str, bind=None) -> Optional[tuple]:
+        """
+        Token to pass to put(): the page is only stored if the table wasn't
+        written in between. None (never stored) for a replica read of a
+        recently written table.
+        """
+        with self._lock:
+            if getattr(getattr(bind, "engine", bind), "read_replica", False):
+                window = float(get_env('READ_YOUR_WRITES_SECONDS', DEFAULT_READ_YOUR_WRITES_SECONDS))
+                written_at = max(self._written_at.get(table_name, 0.0), self._written_at.get(None, 0.0))
+                if written_at and time.monotonic() - written_at < window:
+                    self.replica_skips += 1
+                    return None
+            return (self._epoch, self._generations.get(table_name, 0))
+
+    def _remove(self, key):
+        page = self._entries.pop(key)
+        self.bytes -= len(page.body)
+
+    def get(self, key: Hashable, request: Request) -> Optional[Response]:
+        """Response for a cached page, or None on a miss."""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None and page.expires_at <= time.monotonic():
+                self._remove(key)
+                page = None
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if etag_matches(request, page.etag):
+                self.not_modified += 1
+        return page_response(request, page)
+
+    def put(self, key: Hashable, table_name: str, content: Any, generation: Optional[tuple], request: Request) -> Response:
+        """Serialize and cache a response (unless the table was written meanwhile) and return it."""
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+        return self.put_body(key, table_name, body, generation, request)
+
+    def put_body(self, key: Hashable, table_name: str, body: bytes, generation: Optional[tuple],
+                 request: Request) -> Response:
+        """Like put() for a body that is already encoded JSON."""
+        page = CachedPage(table_name, body, time.monotonic() + self.ttl)
+        max_bytes = self.max_bytes
+        with self._lock:
+            current = (self._epoch, self._generations.get(table_name, 0))
+            if generation is not None and current == generation and len(body) <= max_bytes:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = page
+                self.bytes += len(body)
+                while self.bytes > max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return page_response(request, page)
+
+    def invalidate(self, table_name: str = None):
+        """Drop the cached pages of one table (or all of them)."""
+        with self._lock:
+            self._written_at[table_name] = time.monotonic()
+            if table_name is None:
+                keys = list(self._entries)
+                self._epoch += 1
+            else:
+                keys = [key for key, page in self._entries.items() if page.table_name == table_name]
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+            for key in keys:
+                self._remove(key)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "replica_skips": self.replica_skips,
+            }
+
+
+page_cache = PageCache()
+register_write_listener(page_cache.invalidate)
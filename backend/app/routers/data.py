@@ -1,63 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text, Table as SQLATable, MetaData
+from sqlalchemy import text
 from typing import Dict, Any, Optional, List
+import codecs
+import csv
+import io
+import json
 from backend.app.auth.token import get_current_user
+from backend.app.serialization import json_default, csv_value, compile_converters, encode_compact
 from backend.database.connection import get_db, get_engine
-from backend.models.models import User, Table, UserTableAccess
-from backend.app.routers.debug import is_identity_column
+from backend.database.schema_cache import schema_cache
+from backend.database.row_counts import get_row_count
+from backend.database.write_events import notify_table_write
+from backend.database.read_replica import get_read_db, pin_to_primary
+from backend.database.permissions import permission_index
+from backend.database.single_flight import single_flight, query_key
+from backend.database import query_builder as qb
+from backend.database.filters import build_filters, parse_columns, parse_order_by, parse_value
+from backend.database.facets import get_facet, MAX_FACET_VALUES
+from backend.app.page_cache import page_cache
+from backend.database.bulk import (
+    bulk_insert, bulk_upsert, bulk_delete, run_batch, operation_values, BatchOperationError, BATCH_OPERATIONS,
+    DEFAULT_CHUNK_SIZE
+)
+from backend.database.pagination import (
+    decode_cursor, build_seek_predicate, keyset_cursors
+)
 
 router = APIRouter()
 
+# Default length of the previews returned for large object columns with lob=preview
+DEFAULT_LOB_PREVIEW_LENGTH = 256
+# Characters (bytes for binary columns) read per query when streaming one value
+LOB_CHUNK_SIZE = 512 * 1024
+
 # Removed get_mock_data; only real database tables are supported.
 
 @router.get("/metadata/{table_name}")
-async def get_table_metadata(
+def get_table_metadata(
     table_name: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get metadata for a specific table including column information and primary key.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     # Check if user has access to the table
-    await check_table_access(table_name, current_user["id"], db)
+    check_table_access(table_name, current_user["id"], db)
+    
+    bind = db.get_bind()
+    cache_key = page_cache.key(bind, "metadata", table_name, request,
+                               version=schema_cache.get_catalog(bind).loaded_at)
+    cached = page_cache.get(cache_key, request)
+    if cached is not None:
+        return cached
+    generation = page_cache.generation(table_name, bind)
     
     try:
-        # Get table columns and their types
-        from sqlalchemy import inspect
-        inspector = inspect(db.get_bind())
-        
+
         # Get column information
-        columns = inspector.get_columns(table_name)
+        columns = schema_cache.get_columns(bind, table_name)
         column_info = [{
-            "name": column["name"],
-            "type": str(column["type"]),
-            "nullable": column["nullable"]
+            "name": column.name,
+            "type": column.type,
+            "nullable": column.nullable
         } for column in columns]
         
         # Get primary key information
-        pk_constraint = inspector.get_pk_constraint(table_name)
-        primary_key = pk_constraint["constrained_columns"][0] if pk_constraint and pk_constraint["constrained_columns"] else "id"
+        pk_columns = schema_cache.get_primary_key(bind, table_name)
+        primary_key = pk_columns[0] if pk_columns else "id"
         
         print(f"Primary key for table {table_name}: {primary_key}")
         
         # Check if the primary key is auto-incrementing
         is_auto_increment = False
         try:
-            connection = db.connection()
-            is_auto_increment = is_identity_column(connection, table_name, primary_key)
+            is_auto_increment = schema_cache.is_identity(bind, table_name, primary_key)
             print(f"Is primary key auto-incrementing: {is_auto_increment}")
         except Exception as e:
             print(f"Error checking if primary key is auto-incrementing: {e}")
         
-        return {
+        return page_cache.put(cache_key, table_name, {
             "success": True,
             "table_name": table_name,
             "columns": column_info,
             "primary_key": primary_key,
             "is_auto_increment": is_auto_increment
-        }
+        }, generation, request)
     except Exception as e:
         print(f"Error getting table metadata: {str(e)}")
         raise HTTPException(
@@ -65,7 +97,7 @@ async def get_table_metadata(
             detail=f"Error getting table metadata: {str(e)}"
         )
 
-async def check_table_access(
+def check_table_access(
     table_name: str, 
     user_id: int, 
     db: Session
@@ -78,11 +110,7 @@ async def check_table_access(
         print(f"Development mode: Allowing access to table '{table_name}' for user ID {user_id}")
         
         # Check if the table exists in the database schema
-        from sqlalchemy import inspect
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
-        
-        if table_name not in db_table_names:
+        if not schema_cache.table_exists(db.get_bind(), table_name):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Table '{table_name}' not found in database"
@@ -90,21 +118,17 @@ async def check_table_access(
         
         return True
     
-    # Get the table ID
-    table = db.query(Table).filter(Table.name == table_name).first()
-    if not table:
+    # Registered tables and grants come from the in-memory permission index
+    # of the default database, where users are resolved too, whichever
+    # database (X-Database) the request reads from
+    permissions = permission_index.get(get_engine())
+    if not permissions.has_table(table_name):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Table '{table_name}' not found"
         )
     
-    # Check user access
-    access = db.query(UserTableAccess).filter(
-        UserTableAccess.user_id == user_id,
-        UserTableAccess.table_id == table.id
-    ).first()
-    
-    if not access:
+    if not permissions.can_access(user_id, table_name):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"You don't have access to table '{table_name}'"
@@ -112,80 +136,443 @@ async def check_table_access(
     
     return True
 
+def record_write(table_name: str, current_user: dict) -> None:
+    """
+    Call after committing a write: drops cached data for the table and keeps
+    the user's reads on the primary for a few seconds (read your writes).
+    """
+    notify_table_write(table_name)
+    pin_to_primary(current_user["id"])
+
+def validate_columns(table_info, column_names) -> None:
+    """
+    Reject column names that don't exist in the table, since they are
+    interpolated into generated SQL as identifiers.
+    """
+    unknown = sorted(name for name in column_names if table_info.column(name) is None)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown column(s) for table '{table_info.name}': {', '.join(unknown)}"
+        )
+
+def reject_empty_rows(rows) -> None:
+    """A row without columns has nothing to stage or insert; report it rather than fail the batch."""
+    empty = [index for index, row in enumerate(rows) if not row]
+    if empty:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Rows {empty[:20]} have no column values"
+        )
+
+def get_table_info(bind, table_name: str):
+    """Catalog entry of a table, or 404 if it isn't in the database."""
+    table_info = schema_cache.get_table(bind, table_name)
+    if table_info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table '{table_name}' not found in database"
+        )
+    return table_info
+
+def build_query(build, *args):
+    """Run a query_builder function, reporting unknown identifiers as 400."""
+    try:
+        return build(*args)
+    except qb.QueryBuildError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.get("/{table_name}")
-async def get_table_data(
+def get_table_data(
     table_name: str,
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
     filter_column: Optional[str] = None,
     filter_value: Optional[str] = None,
+    filter: Optional[List[str]] = Query(None),
+    columns: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|keyset)$"),
+    cursor: Optional[str] = None,
+    order_by: Optional[str] = None,
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
+    format: str = Query("objects", pattern="^(objects|compact)$"),
+    lob: str = Query("full", pattern="^(full|preview)$"),
+    preview_length: int = Query(DEFAULT_LOB_PREVIEW_LENGTH, ge=1, le=8000),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get data from a table with pagination and optional filtering.
+
+    `filter` may be repeated, each one `column:op[:value]` with op one of
+    eq, in (comma-separated values), range (low,high; either may be empty),
+    prefix, isnull or notnull, e.g. filter=city:eq:Berlin&filter=amount:range:10,100.
+    Values are checked against the column types. filter_column/filter_value
+    still does a substring search.
+
+    `order_by` is a comma-separated sort key, '-' marking a descending column
+    (e.g. order_by=city,-created_at); the primary key is appended to break
+    ties. Without it rows are ordered by the primary key.
+
+    `columns` is a comma-separated list of columns to return (the primary
+    key, and for keyset pagination the sort key, are always included);
+    without it every column is returned.
+
+    pagination=offset (default) pages with OFFSET/FETCH using `page`.
+    pagination=keyset seeks on the sort key and returns opaque
+    `next_cursor`/`prev_cursor` values to pass back as `cursor`.
+
+    count=exact (default) runs a cached COUNT(*), count=estimated reads
+    partition statistics for unfiltered requests and count=none skips the
+    total altogether.
+
+    format=objects (default) returns `data` as one object per row.
+    format=compact returns `columns` once and `rows` as arrays, encoded with
+    precompiled per-column converters (decimals as strings, dates ISO 8601,
+    binary base64).
+
+    lob=preview cuts large object columns ((max) types, xml, text, ntext,
+    image) to their first `preview_length` characters (bytes for binary)
+    and adds `lob_lengths`: per column, the DATALENGTH in bytes of each
+    row's full value (null for NULL). GET /data/{table_name}/{row_id}/value/{column}
+    streams a whole value.
+
+    Pages are cached until the table is written (or PAGE_CACHE_TTL passes)
+    and carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     print(f"\n\n=== GET TABLE DATA ===\nTable: {table_name}\nUser: {current_user}\n======================")
     
+    bind = db.get_bind()
+    cache_key = page_cache.key(bind, "data", table_name, request)
+    cached = page_cache.get(cache_key, request)
+    if cached is not None:
+        return cached
+    generation = page_cache.generation(table_name, bind)
+    
     # Check if the table exists in the database schema
-    from sqlalchemy import inspect
-    inspector = inspect(db.get_bind())
-    db_table_names = inspector.get_table_names()
+    table_info = get_table_info(bind, table_name)
     
-    if table_name not in db_table_names:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Table '{table_name}' not found in database"
-        )
+    # Build the query; identifiers are validated against the catalog and every value is bound
+    where_clauses, params = build_query(build_filters, table_info, filter, filter_column, filter_value)
+    filter_params = dict(params)
     
-    # Calculate offset for pagination
-    offset = (page - 1) * page_size
+    # Resolve the sort key: explicit order_by (ties broken on the primary key), else the primary key
+    key_columns, descending_columns = build_query(parse_order_by, table_info, order_by)
+    if not key_columns:
+        key_columns = list(table_info.primary_key)
+    elif not table_info.is_unique_key(key_columns):
+        key_columns += [column for column in table_info.primary_key if column not in key_columns]
     
-    # Build the query
-    query = f"SELECT * FROM {table_name}"
-    count_query = f"SELECT COUNT(*) AS total FROM {table_name}"
+    # Project only the requested columns; cursors need the sort key of the edge rows
+    required_columns = list(table_info.primary_key) + (key_columns if pagination == "keyset" else [])
+    select_columns = build_query(parse_columns, table_info, columns, required_columns)
+    preview_columns = qb.lob_columns(table_info, select_columns) if lob == "preview" else []
+    if preview_columns:
+        params["preview_length"] = preview_length
     
-    # Add filtering if specified
-    if filter_column and filter_value:
-        query += f" WHERE {filter_column} LIKE '%{filter_value}%'"
-        count_query += f" WHERE {filter_column} LIKE '%{filter_value}%'"
+    count_query = qb.count_query(table_info, where_clauses)
     
-    # Add pagination
-    query += f" ORDER BY (SELECT NULL) OFFSET {offset} ROWS FETCH NEXT {page_size} ROWS ONLY"
+    direction = None
+    if pagination == "keyset":
+        if not key_columns or not table_info.is_unique_key(key_columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Keyset pagination requires a primary key or order_by columns that form a unique index"
+            )
+        if any(table_info.column(column).nullable for column in key_columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Keyset pagination requires non-nullable order_by columns"
+            )
+        seek_clauses = list(where_clauses)
+        if cursor:
+            try:
+                key_values, direction = decode_cursor(cursor, len(key_columns))
+                # JSON carries dates, decimals and GUIDs as strings; bind them as the column's type
+                key_values = [
+                    parse_value(table_info.column(column), value) if isinstance(value, str) else value
+                    for column, value in zip(key_columns, key_values)
+                ]
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            except qb.QueryBuildError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cursor: {e}")
+            seek_predicate, seek_params = build_seek_predicate(key_columns, key_values, direction, descending_columns)
+            seek_clauses.append(seek_predicate)
+            params.update(seek_params)
+        # Fetch one extra row to know whether another page exists
+        query = qb.keyset_page_query(
+            table_info, seek_clauses, key_columns,
+            descending=(direction == "prev"), descending_columns=descending_columns,
+            columns=select_columns, lob_preview=bool(preview_columns)
+        )
+        params["limit"] = page_size + 1
+    else:
+        # Order by the sort key when there is one so pages are deterministic
+        query = qb.offset_page_query(
+            table_info, where_clauses, key_columns, descending_columns, select_columns, bool(preview_columns)
+        )
+        params.update(qb.page_params(page, page_size))
     
-    try:
-        # Execute the queries
-        with get_engine().connect() as connection:
+    def run_queries():
+        with bind.connect() as connection:
             # Get total count
-            result = connection.execute(text(count_query))
-            total_count = result.scalar()
+            total_count, count_mode = get_row_count(
+                connection, table_name, count_query, filter_params,
+                mode=count, filtered=bool(where_clauses)
+            )
             
             # Get paginated data
-            result = connection.execute(text(query))
-            rows = result.fetchall()
-            
-            # Get column names
-            columns = result.keys()
-            
-            # Convert rows to dictionaries
-            data = [dict(zip(columns, row)) for row in rows]
-            
+            result = connection.execute(text(query), params)
+            return total_count, count_mode, list(result.keys()), result.fetchall()
+    
+    try:
+        # Identical requests already in flight share one execution
+        key = query_key(bind, table_name, count_query, query, params=params, extra=count)
+        total_count, count_mode, result_columns, rows = single_flight.do(key, run_queries)
+        
+        if pagination == "keyset":
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            if direction == "prev":
+                rows = rows[::-1]
+            # Cursors only need the first and last row of the page
+            edge_rows = [dict(zip(result_columns, row)) for row in rows[:1] + rows[-1:]]
+            next_cursor, prev_cursor = keyset_cursors(edge_rows, key_columns, direction, has_more)
+            response = {
+                "total": total_count,
+                "count_mode": count_mode,
+                "page_size": page_size,
+                "pagination": "keyset",
+                "order_by": ["-" + column if column in descending_columns else column for column in key_columns],
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        else:
             # Return data with pagination info
-            return {
+            response = {
                 "total": total_count,
+                "count_mode": count_mode,
                 "page": page,
                 "page_size": page_size,
-                "total_pages": (total_count + page_size - 1) // page_size,
-                "data": data
+                "total_pages": (total_count + page_size - 1) // page_size if total_count is not None else None,
             }
+        
+        if preview_columns:
+            # The DATALENGTH of each previewed column follows the regular columns
+            width = len(result_columns) - len(preview_columns)
+            response["lob_lengths"] = {
+                name: [row[width + i] for row in rows] for i, name in enumerate(preview_columns)
+            }
+            result_columns = result_columns[:width]
+            rows = [row[:width] for row in rows]
+        
+        if format == "compact":
+            column_types = tuple(
+                table_info.column(name).type_name if table_info.column(name) else None
+                for name in result_columns
+            )
+            body = encode_compact(response, result_columns, rows, compile_converters(column_types))
+            return page_cache.put_body(cache_key, table_name, body, generation, request)
+        
+        # Convert rows to dictionaries
+        response["data"] = [dict(zip(result_columns, row)) for row in rows]
+        return page_cache.put(cache_key, table_name, response, generation, request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error querying table: {str(e)}"
         )
 
+@router.get("/{table_name}/export")
+def export_table_data(
+    table_name: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filter_column: Optional[str] = None,
+    filter_value: Optional[str] = None,
+    filter: Optional[List[str]] = Query(None),
+    order_by: Optional[str] = None,
+    columns: Optional[str] = None,
+    batch_size: int = Query(5000, ge=100, le=50000),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream a whole table (optionally filtered, sorted and projected, with the
+    same `filter`, `order_by` and `columns` syntax as GET /data/{table_name})
+    as CSV or newline-delimited JSON. Rows are read with fetchmany() in
+    batches and written out as they arrive, so memory use doesn't grow with
+    the size of the table.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    where_clauses, params = build_query(build_filters, table_info, filter, filter_column, filter_value)
+    key_columns, descending_columns = build_query(parse_order_by, table_info, order_by)
+    select_columns = build_query(parse_columns, table_info, columns, table_info.primary_key)
+    
+    query = qb.select_query(
+        table_info, where_clauses, key_columns or table_info.primary_key, descending_columns, select_columns
+    )
+    
+    # Resolve the engine now; the session is closed before the response streams
+    bind = db.get_bind()
+
+    def generate_rows():
+        with bind.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(text(query), params)
+            result_columns = list(result.keys())
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(result_columns)
+                yield buffer.getvalue()
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                if format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                    writer.writerows([csv_value(value) for value in row] for row in rows)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(dict(zip(result_columns, row)), default=json_default) + "\n"
+                        for row in rows
+                    )
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    )
+
+@router.get("/{table_name}/facets")
+def get_column_facets(
+    table_name: str,
+    column: str,
+    prefix: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_FACET_VALUES),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    The most frequent values of a column with their counts (for filter
+    dropdowns), optionally only values starting with `prefix` (type-ahead).
+
+    Computed with one GROUP BY and cached per table, column and prefix until
+    the table is written. Tables above FACET_SAMPLE_THRESHOLD rows are
+    sampled, in which case the counts are estimates and `sampled` is true.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    bind = db.get_bind()
+    table_info = get_table_info(bind, table_name)
+    
+    def load():
+        with bind.connect() as connection:
+            return get_facet(connection, table_info, column, prefix)
+    
+    try:
+        # Identical requests already in flight share one execution
+        facet = single_flight.do(query_key(bind, table_name, "facets", extra=(column, prefix or "")), load)
+    except qb.QueryBuildError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying table: {str(e)}"
+        )
+    return {
+        "table": table_name,
+        "column": column,
+        "prefix": prefix,
+        "values": facet["values"][:limit],
+        "sampled": facet["sampled"],
+        "estimated_rows": facet["estimated_rows"],
+    }
+
+@router.get("/{table_name}/{row_id}/value/{column_name}")
+def get_cell_value(
+    table_name: str,
+    row_id: str,
+    column_name: str,
+    pk: str = None,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream the full value of one large object column of one row (text as
+    UTF-8, binary as-is), e.g. after a lob=preview page showed it truncated.
+    The row is identified by `pk` (default: the primary key). The value is
+    read LOB_CHUNK_SIZE at a time, so memory use doesn't grow with its size.
+    Returns 204 if the value is NULL.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    pk_col = build_query(qb.key_column, table_info, pk)
+    if not pk_col:
+        raise HTTPException(status_code=500, detail=f"Table {table_name} has no primary key.")
+    build_query(qb.column_identifier, table_info, column_name)
+    column = table_info.column(column_name)
+    if not qb.is_lob(column):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Column '{column_name}' ({column.type}) is not a large object column"
+        )
+    key = build_query(parse_value, table_info.column(pk_col), row_id)
+    query = text(qb.lob_chunk_query(table_info, column_name, pk_col))
+    
+    # Read the first chunk now so a missing row is a 404 rather than a broken stream
+    bind = db.get_bind()
+    with bind.connect() as connection:
+        first = connection.execute(query, {"key": key, "start": 1, "length": LOB_CHUNK_SIZE}).first()
+    if first is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Row {row_id} not found in table {table_name}"
+        )
+    if first.length is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    unicode_text = qb.is_unicode_text(column)
+    decoder = codecs.getincrementaldecoder("utf-16-le")() if unicode_text else None
+    
+    def encode(chunk):
+        if unicode_text:
+            return decoder.decode(chunk).encode("utf-8")
+        return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    
+    def generate_value():
+        yield encode(first.chunk or b"")
+        start = 1 + LOB_CHUNK_SIZE
+        if start > first.length or not first.chunk:
+            return
+        with bind.connect() as connection:
+            while start <= first.length:
+                row = connection.execute(query, {"key": key, "start": start, "length": LOB_CHUNK_SIZE}).first()
+                if row is None or not row.chunk:
+                    break
+                yield encode(row.chunk)
+                start += LOB_CHUNK_SIZE
+    
+    if qb.is_binary(column):
+        media_type = "application/octet-stream"
+    elif column.type_name.lower() == "xml":
+        media_type = "application/xml"
+    else:
+        media_type = "text/plain; charset=utf-8"
+    return StreamingResponse(generate_value(), media_type=media_type)
+
 @router.patch("/{table_name}/{row_id}")
-async def update_row(
+def update_row(
     table_name: str,
     row_id: int,
     updates: Dict[str, Any],
@@ -197,51 +584,34 @@ async def update_row(
     Update a specific row in a table.
     """
     # Check if user has access to the table
-    await check_table_access(table_name, current_user["id"], db)
+    check_table_access(table_name, current_user["id"], db)
     
+    # Use provided primary key column name if available, otherwise detect it dynamically
+    table_info = get_table_info(db.get_bind(), table_name)
+    pk_col = build_query(qb.key_column, table_info, pk)
+    if not pk_col:
+        print(f"[ERROR] Table {table_name} has no primary key.")
+        raise HTTPException(status_code=500, detail=f"Table {table_name} has no primary key.")
+    print(f"[DEBUG] Using primary key column: {pk_col}")
+
+    # Build the update query; columns are validated against the catalog and
+    # every value is a parameter
+    query, set_columns = build_query(qb.update_by_key, table_info, updates.keys(), pk_col)
+    values = [updates[column] for column in set_columns] + [row_id]
+    print(f"Executing query: {query} with values: {values}")
+
     try:
         # Try direct raw SQL execution using pyodbc for better permission handling
         # Get the raw connection from SQLAlchemy
         connection = db.connection()
         cursor = connection.connection.cursor()
 
-        # Use provided primary key column name if available, otherwise detect it dynamically
-        if pk:
-            print(f"[DEBUG] Using provided primary key column: {pk}")
-            pk_col = pk
-        else:
-            # Dynamically detect the primary key column for the table
-            from sqlalchemy import inspect
-            print("[DEBUG] Inspecting table for primary key...")
-            inspector = inspect(db.get_bind())
-            pk_cols = inspector.get_pk_constraint(table_name, schema="dbo")
-            print(f"[DEBUG] PK constraint info: {pk_cols}")
-            if not pk_cols or not pk_cols['constrained_columns']:
-                print(f"[ERROR] Table {table_name} has no primary key.")
-                raise HTTPException(status_code=500, detail=f"Table {table_name} has no primary key.")
-            pk_col = pk_cols['constrained_columns'][0]
-            print(f"[DEBUG] Using detected primary key column: {pk_col}")
-
-        # Build the update query using parameterized statements
-        set_parts = []
-        values = []
-
-        for key, value in updates.items():
-            set_parts.append(f"{key} = ?")
-            values.append(value)
-
-        # Add the row_id parameter at the end
-        values.append(row_id)
-
-        set_clause = ", ".join(set_parts)
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {pk_col} = ?"
-        print(f"Executing query: {query} with values: {values}")
-
         try:
             # Execute the update
             cursor.execute(query, values)
             rows_affected = cursor.rowcount
             connection.commit()
+            record_write(table_name, current_user)
 
             if rows_affected == 0:
                 raise HTTPException(
@@ -267,7 +637,7 @@ async def update_row(
         )
 
 @router.post("/{table_name}")
-async def insert_row(
+def insert_row(
     table_name: str,
     data: Dict[str, Any],
     pk: str = None,
@@ -278,43 +648,30 @@ async def insert_row(
     Insert a new row into a table.
     """
     # Check if user has access to the table
-    await check_table_access(table_name, current_user["id"], db)
+    check_table_access(table_name, current_user["id"], db)
     
+    # Use provided primary key column name if available, otherwise detect it dynamically
+    table_info = get_table_info(db.get_bind(), table_name)
+    pk_col = build_query(qb.key_column, table_info, pk)
+    print(f"[DEBUG] Primary key column: {pk_col}")
+
+    # Build the insert queries (with and without OUTPUT of the key); columns
+    # are validated against the catalog and every value is a parameter
+    query, insert_columns = build_query(qb.insert_row, table_info, data.keys(), pk_col)
+    simple_query, _ = qb.insert_row(table_info, insert_columns)
+    values = [data[column] for column in insert_columns]
+
     try:
         # Try direct raw SQL execution using pyodbc for better permission handling
         # Get the raw connection from SQLAlchemy
         connection = db.connection()
         cursor = connection.connection.cursor()
 
-        # Use provided primary key column name if available, otherwise detect it dynamically
-        if pk:
-            print(f"[DEBUG] Using provided primary key column: {pk}")
-            pk_col = pk
-        else:
-            # Dynamically detect the primary key column for the table
-            from sqlalchemy import inspect
-            print("[DEBUG] Inspecting table for primary key...")
-            inspector = inspect(db.get_bind())
-            pk_cols = inspector.get_pk_constraint(table_name, schema="dbo")
-            print(f"[DEBUG] PK constraint info: {pk_cols}")
-            if not pk_cols or not pk_cols['constrained_columns']:
-                pk_col = None
-                print(f"[DEBUG] No primary key found for table {table_name}")
-            else:
-                pk_col = pk_cols['constrained_columns'][0]
-                print(f"[DEBUG] Using detected primary key column: {pk_col}")
-
-        # Build the insert query using parameterized statements for security
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join(["?" for _ in data.keys()])
-        values = list(data.values())
-
         # Use direct SQL execution with pyodbc
         try:
             if pk_col:
                 try:
-                    # For SQL Server, we use this format to get back the inserted PK (if exists)
-                    query = f"INSERT INTO {table_name} ({columns}) OUTPUT INSERTED.{pk_col} VALUES ({placeholders})"
+                    # For SQL Server, we use OUTPUT INSERTED to get back the inserted PK (if exists)
                     print(f"Executing query: {query} with values: {values}")
 
                     cursor.execute(query, values)
@@ -323,6 +680,7 @@ async def insert_row(
                     
                     # Commit the transaction
                     connection.commit()
+                    record_write(table_name, current_user)
                     
                     if new_id is not None:
                         # Return the inserted row data with the primary key
@@ -357,11 +715,11 @@ async def insert_row(
                     connection.rollback()
                     
                     # Try a simple insert without OUTPUT
-                    simple_query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
                     print(f"Executing simple query: {simple_query} with values: {values}")
                     
                     cursor.execute(simple_query, values)
                     connection.commit()
+                    record_write(table_name, current_user)
                     
                     # Return the original data as the response
                     return_data = {"message": "Row inserted successfully using alternate method"}
@@ -373,11 +731,11 @@ async def insert_row(
                     return return_data
             else:
                 # No primary key column, use simple insert
-                query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-                print(f"Executing query: {query} with values: {values}")
+                print(f"Executing query: {simple_query} with values: {values}")
 
-                cursor.execute(query, values)
+                cursor.execute(simple_query, values)
                 connection.commit()
+                record_write(table_name, current_user)
                 
                 # Return the original data as the response
                 return_data = {"message": "Row inserted successfully"}
@@ -406,8 +764,246 @@ async def insert_row(
             detail=f"Error inserting row: {str(e)}"
         )
 
+@router.post("/{table_name}/bulk")
+def bulk_insert_rows(
+    table_name: str,
+    rows: List[Dict[str, Any]],
+    atomic: bool = False,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Insert many rows in one transaction.
+
+    Rows are sent in chunks with fast_executemany into a staging table and
+    inserted with one statement per chunk. Results (including generated
+    primary keys) come back in input order. Failing rows are reported
+    individually unless atomic=true, in which case any error rolls back
+    the whole batch.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    if not rows:
+        return {"message": "No rows to insert", "inserted": 0, "failed": 0, "results": []}
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    reject_empty_rows(rows)
+    validate_columns(table_info, {column for row in rows for column in row})
+    
+    connection = db.connection()
+    cursor = connection.connection.cursor()
+    try:
+        results = bulk_insert(cursor, table_info, rows, chunk_size=chunk_size, atomic=atomic)
+        connection.commit()
+        record_write(table_name, current_user)
+    except Exception as sql_error:
+        # Roll back on error
+        connection.rollback()
+        print(f"SQL Error: {sql_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(sql_error)}"
+        )
+    
+    inserted = sum(1 for result in results if result["success"])
+    return {
+        "message": f"Inserted {inserted} of {len(rows)} rows",
+        "inserted": inserted,
+        "failed": len(rows) - inserted,
+        "results": results
+    }
+
+@router.post("/{table_name}/upsert")
+def bulk_upsert_rows(
+    table_name: str,
+    rows: List[Dict[str, Any]],
+    atomic: bool = False,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Insert or update many rows keyed on the table's primary key.
+
+    Each chunk is loaded into a staging table and applied with a single
+    MERGE, so syncing thousands of rows takes one round trip per chunk.
+    Every row must include all primary key columns.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    if not rows:
+        return {"message": "No rows to upsert", "inserted": 0, "updated": 0, "failed": 0, "results": []}
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    if not table_info.primary_key:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Table {table_name} has no primary key.")
+    reject_empty_rows(rows)
+    validate_columns(table_info, {column for row in rows for column in row})
+    missing_key = [index for index, row in enumerate(rows) if any(c not in row for c in table_info.primary_key)]
+    if missing_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Rows {missing_key[:20]} are missing primary key column(s) {table_info.primary_key}"
+        )
+    
+    connection = db.connection()
+    cursor = connection.connection.cursor()
+    try:
+        results = bulk_upsert(cursor, table_info, rows, chunk_size=chunk_size, atomic=atomic)
+        connection.commit()
+        record_write(table_name, current_user)
+    except Exception as sql_error:
+        # Roll back on error
+        connection.rollback()
+        print(f"SQL Error: {sql_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(sql_error)}"
+        )
+    
+    inserted = sum(1 for result in results if result.get("action") == "inserted")
+    updated = sum(1 for result in results if result.get("action") == "updated")
+    unchanged = sum(1 for result in results if result.get("action") == "unchanged")
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "message": f"Inserted {inserted} and updated {updated} of {len(rows)} rows",
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged,
+        "failed": failed,
+        "results": results
+    }
+
+@router.post("/{table_name}/batch")
+def run_batch_operations(
+    table_name: str,
+    operations: List[Dict[str, Any]] = Body(..., embed=True),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply an ordered list of operations atomically.
+
+    Each operation is {"op": "insert", "values": {...}},
+    {"op": "update", "key": ..., "values": {...}} or {"op": "delete", "key": ...},
+    where key is the primary key value (an object for composite keys).
+    Everything runs on one connection in one transaction: if any operation
+    fails the whole batch is rolled back and the failing index is reported.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    for index, operation in enumerate(operations):
+        op = operation.get("op")
+        if op not in BATCH_OPERATIONS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Operation {index}: unknown op '{op}'")
+        if operation.get("values") is not None and not isinstance(operation["values"], dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Operation {index}: values must be an object of column values"
+            )
+        values = operation_values(operation)
+        if op in ("insert", "update") and not values:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Operation {index}: no values given")
+        if op in ("update", "delete"):
+            if not table_info.primary_key:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Table {table_name} has no primary key.")
+            key = operation.get("key")
+            if key is None or (isinstance(key, dict) and any(c not in key for c in table_info.primary_key)) \
+                    or (not isinstance(key, dict) and len(table_info.primary_key) > 1):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Operation {index}: key must identify primary key {table_info.primary_key}"
+                )
+        validate_columns(table_info, values.keys())
+    
+    if not operations:
+        return {"message": "No operations to run", "results": []}
+    
+    connection = db.connection()
+    cursor = connection.connection.cursor()
+    try:
+        results = run_batch(cursor, table_info, operations)
+        connection.commit()
+        record_write(table_name, current_user)
+    except BatchOperationError as op_error:
+        connection.rollback()
+        print(f"SQL Error in batch operation {op_error.index}: {op_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error in operation {op_error.index}: {str(op_error)}"
+        )
+    except Exception as sql_error:
+        # Roll back on error
+        connection.rollback()
+        print(f"SQL Error: {sql_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(sql_error)}"
+        )
+    
+    return {
+        "message": f"Applied {len(results)} operations",
+        "results": results
+    }
+
+@router.delete("/{table_name}")
+def delete_rows(
+    table_name: str,
+    keys: List[Any] = Body(..., embed=True),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete many rows by primary key in one transaction.
+
+    `keys` holds primary key values, or objects mapping each primary key
+    column to its value (required for composite keys). Returns the keys that were
+    actually deleted; keys that matched no row are simply not listed.
+    """
+    # Check if user has access to the table
+    check_table_access(table_name, current_user["id"], db)
+    
+    table_info = get_table_info(db.get_bind(), table_name)
+    if not table_info.primary_key:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Table {table_name} has no primary key.")
+    if not all(
+        all(c in key for c in table_info.primary_key) if isinstance(key, dict) else len(table_info.primary_key) == 1
+        for key in keys
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Keys must be objects with primary key columns {table_info.primary_key}"
+        )
+    if not keys:
+        return {"message": "No rows to delete", "deleted": []}
+    
+    connection = db.connection()
+    cursor = connection.connection.cursor()
+    try:
+        deleted = bulk_delete(cursor, table_info, keys)
+        connection.commit()
+        record_write(table_name, current_user)
+    except Exception as sql_error:
+        # Roll back on error
+        connection.rollback()
+        print(f"SQL Error: {sql_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(sql_error)}"
+        )
+    
+    return {
+        "message": f"Deleted {len(deleted)} of {len(keys)} rows",
+        "deleted": deleted
+    }
+
 @router.delete("/{table_name}/{row_id}")
-async def delete_row(
+def delete_row(
     table_name: str,
     row_id: int,
     pk: str = None,
@@ -420,7 +1016,7 @@ async def delete_row(
     print(f"[DEBUG] DELETE endpoint called for table: {table_name}, row_id: {row_id}, user: {current_user}")
     try:
         print("[DEBUG] Checking table access...")
-        await check_table_access(table_name, current_user["id"], db)
+        check_table_access(table_name, current_user["id"], db)
         print("[DEBUG] Table access granted.")
         
         # Try direct raw SQL execution using pyodbc for better permission handling
@@ -430,24 +1026,15 @@ async def delete_row(
         print("[DEBUG] Raw connection and cursor acquired.")
         
         # Use provided primary key column name if available, otherwise detect it dynamically
-        if pk:
-            print(f"[DEBUG] Using provided primary key column: {pk}")
-            pk_col = pk
-        else:
-            # Dynamically detect the primary key column for the table
-            from sqlalchemy import inspect
-            print("[DEBUG] Inspecting table for primary key...")
-            inspector = inspect(db.get_bind())
-            pk_cols = inspector.get_pk_constraint(table_name, schema="dbo")
-            print(f"[DEBUG] PK constraint info: {pk_cols}")
-            if not pk_cols or not pk_cols['constrained_columns']:
-                print(f"[ERROR] Table {table_name} has no primary key.")
-                raise HTTPException(status_code=500, detail=f"Table {table_name} has no primary key.")
-            pk_col = pk_cols['constrained_columns'][0]
-            print(f"[DEBUG] Using detected primary key column: {pk_col}")
+        table_info = get_table_info(db.get_bind(), table_name)
+        pk_col = build_query(qb.key_column, table_info, pk)
+        if not pk_col:
+            print(f"[ERROR] Table {table_name} has no primary key.")
+            raise HTTPException(status_code=500, detail=f"Table {table_name} has no primary key.")
+        print(f"[DEBUG] Using primary key column: {pk_col}")
 
         # Build the delete query using parameterized statements
-        query = f"DELETE FROM {table_name} WHERE {pk_col} = ?"
+        query = qb.delete_by_key(table_info, pk_col)
         print(f"[DEBUG] Prepared query: {query} with values: [{row_id}]")
         
         try:
@@ -457,6 +1044,7 @@ async def delete_row(
             print(f"[DEBUG] Rows affected: {rows_affected}")
             print("[DEBUG] Committing transaction...")
             connection.commit()
+            record_write(table_name, current_user)
             print("[DEBUG] Transaction committed.")
             
             if rows_affected == 0:
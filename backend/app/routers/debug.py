@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import inspect, text
-from backend.database.connection import get_db, get_engine
+from backend.database.connection import get_db
+from backend.database.schema_cache import schema_cache
+from backend.database.row_counts import get_row_count, count_cache
+from backend.database.facets import facet_cache
+from backend.database.write_events import notify_table_write
+from backend.database.single_flight import single_flight, query_key
+from backend.database import query_builder as qb
+from backend.database.filters import build_filters, parse_columns, parse_order_by
 from backend.models.models import User, Table, UserTableAccess
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 import pyodbc
 
 router = APIRouter()
@@ -30,7 +37,7 @@ def is_identity_column(connection, table_name, column_name):
         return False
 
 @router.get("/test-table-metadata/{table_name}")
-async def get_test_table_metadata(table_name: str, db: Session = Depends(get_db)):
+def get_test_table_metadata(table_name: str, db: Session = Depends(get_db)):
     """
     Test endpoint to get table metadata including primary key information without authentication.
     """
@@ -38,30 +45,27 @@ async def get_test_table_metadata(table_name: str, db: Session = Depends(get_db)
         print(f"\n\n=== GET TEST TABLE METADATA ===\nTable: {table_name}\n===========================")
         
         # Check if the table exists in the database schema
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
-        
-        if table_name not in db_table_names:
+        bind = db.get_bind()
+        if not schema_cache.table_exists(bind, table_name):
             return {"success": False, "error": f"Table '{table_name}' not found in database"}
         
         # Get table columns
-        columns = inspector.get_columns(table_name)
+        columns = schema_cache.get_columns(bind, table_name)
         column_info = [{
-            "name": col["name"],
-            "type": str(col["type"]),
-            "nullable": col["nullable"]
+            "name": col.name,
+            "type": col.type,
+            "nullable": col.nullable
         } for col in columns]
         
         # Get primary key information
-        pk_constraint = inspector.get_pk_constraint(table_name)
-        if pk_constraint and pk_constraint["constrained_columns"]:
-            primary_key = pk_constraint["constrained_columns"][0]
+        pk_columns = schema_cache.get_primary_key(bind, table_name)
+        if pk_columns:
+            primary_key = pk_columns[0]
             print(f"Primary key for table {table_name}: {primary_key}")
             # Check if the primary key is auto-incrementing
             is_auto_increment = False
             try:
-                connection = db.connection()
-                is_auto_increment = is_identity_column(connection, table_name, primary_key)
+                is_auto_increment = schema_cache.is_identity(bind, table_name, primary_key)
                 print(f"Is primary key auto-incrementing: {is_auto_increment}")
             except Exception as e:
                 print(f"Error checking if primary key is auto-incrementing: {e}")
@@ -82,7 +86,7 @@ async def get_test_table_metadata(table_name: str, db: Session = Depends(get_db)
         return {"success": False, "error": str(e)}
 
 @router.patch("/test-table-data/{table_name}/{row_id}")
-async def update_test_table_row(
+def update_test_table_row(
     table_name: str,
     row_id: int,
     updates: Dict[str, Any],
@@ -96,11 +100,8 @@ async def update_test_table_row(
         print(f"\n\n=== UPDATE TEST TABLE ROW ===\nTable: {table_name}\nRow ID: {row_id}\nUpdates: {updates}\n===========================")
         
         # Check if the table exists in the database schema
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
-        
-        if table_name not in db_table_names:
+        table_info = schema_cache.get_table(db.get_bind(), table_name)
+        if table_info is None:
             return {"success": False, "error": f"Table '{table_name}' not found in database"}
         
         try:
@@ -109,26 +110,16 @@ async def update_test_table_row(
             connection = db.connection()
             cursor = connection.connection.cursor()
             
-            # Build the update query using parameterized statements
-            set_parts = []
-            values = []
-            
-            # Remove primary key from updates if present
-            if primary_key := (pk if pk else 'id'):
-                updates = {k: v for k, v in updates.items() if k != primary_key}
-            for key, value in updates.items():
-                set_parts.append(f"{key} = ?")
-                values.append(value)
-                
-            # Add the row_id parameter at the end
-            values.append(row_id)
-            
             # Use provided primary key column name if available, otherwise use 'id'
-            primary_key = pk if pk else 'id'
+            primary_key = qb.key_column(table_info, pk if pk else 'id')
             print(f"Using primary key column: {primary_key}")
             
-            set_clause = ", ".join(set_parts)
-            query = f"UPDATE {table_name} SET {set_clause} WHERE {primary_key} = ?"
+            # Remove primary key from updates if present
+            updates = {k: v for k, v in updates.items() if k != primary_key}
+            
+            # Build the update query using parameterized statements
+            query, set_columns = qb.update_by_key(table_info, updates.keys(), primary_key)
+            values = [updates[column] for column in set_columns] + [row_id]
             print(f"Executing query: {query} with values: {values}")
             
             try:
@@ -136,6 +127,7 @@ async def update_test_table_row(
                 cursor.execute(query, values)
                 rows_affected = cursor.rowcount
                 connection.commit()
+                notify_table_write(table_name)
                 
                 if rows_affected == 0:
                     return {"success": False, "error": f"Row {row_id} not found in table {table_name}"}
@@ -156,7 +148,7 @@ async def update_test_table_row(
         return {"success": False, "error": f"Error updating row: {str(e)}"}
 
 @router.post("/test-table-data/{table_name}")
-async def insert_test_table_row(
+def insert_test_table_row(
     table_name: str,
     data: Dict[str, Any],
     pk: str = None,
@@ -169,11 +161,8 @@ async def insert_test_table_row(
         print(f"\n\n=== INSERT TEST TABLE ROW ===\nTable: {table_name}\nData: {data}\n===========================")
         
         # Check if the table exists in the database schema
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
-        
-        if table_name not in db_table_names:
+        table_info = schema_cache.get_table(db.get_bind(), table_name)
+        if table_info is None:
             return {"success": False, "error": f"Table '{table_name}' not found in database"}
         
         try:
@@ -182,20 +171,19 @@ async def insert_test_table_row(
             connection = db.connection()
             cursor = connection.connection.cursor()
             
-            # Build the insert query using parameterized statements for security
-            columns = ", ".join(data.keys())
-            placeholders = ", ".join(["?" for _ in data.keys()])
-            values = list(data.values())
+            # Use provided primary key column name if available, otherwise use 'id'
+            primary_key = qb.key_column(table_info, pk if pk else 'id')
+            print(f"Using primary key column: {primary_key}")
+            
+            # Build the insert queries using parameterized statements for security
+            query, insert_columns = qb.insert_row(table_info, data.keys(), primary_key)
+            simple_query, _ = qb.insert_row(table_info, insert_columns)
+            values = [data[column] for column in insert_columns]
             
             # Use direct SQL execution with pyodbc
             try:
-                # Use provided primary key column name if available, otherwise use 'id'
-                primary_key = pk if pk else 'id'
-                print(f"Using primary key column: {primary_key}")
-                
                 try:
-                    # For SQL Server, we use this format to get back the inserted ID
-                    query = f"INSERT INTO {table_name} ({columns}) OUTPUT INSERTED.{primary_key} VALUES ({placeholders})"
+                    # For SQL Server, we use OUTPUT INSERTED to get back the inserted ID
                     print(f"Executing query: {query} with values: {values}")
                     
                     cursor.execute(query, values)
@@ -207,6 +195,7 @@ async def insert_test_table_row(
                         
                     # Commit the transaction
                     connection.commit()
+                    notify_table_write(table_name)
                     
                     if new_id is not None:
                         # Return the inserted row data with the primary key
@@ -244,11 +233,11 @@ async def insert_test_table_row(
                     connection.rollback()
                     
                     # Try a simple insert without OUTPUT
-                    simple_query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
                     print(f"Executing simple query: {simple_query} with values: {values}")
                     
                     cursor.execute(simple_query, values)
                     connection.commit()
+                    notify_table_write(table_name)
                     
                     # Return the original data as the response
                     return_data = {
@@ -286,7 +275,7 @@ async def insert_test_table_row(
         }
 
 @router.delete("/test-table-data/{table_name}/{row_id}")
-async def delete_test_table_row(
+def delete_test_table_row(
     table_name: str,
     row_id: int,
     pk: str = None,
@@ -299,11 +288,8 @@ async def delete_test_table_row(
         print(f"\n\n=== DELETE TEST TABLE ROW ===\nTable: {table_name}\nRow ID: {row_id}\n===========================")
         
         # Check if the table exists in the database schema
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
-        
-        if table_name not in db_table_names:
+        table_info = schema_cache.get_table(db.get_bind(), table_name)
+        if table_info is None:
             return {"success": False, "error": f"Table '{table_name}' not found in database"}
         
         try:
@@ -313,11 +299,11 @@ async def delete_test_table_row(
             cursor = connection.connection.cursor()
             
             # Use provided primary key column name if available, otherwise use 'id'
-            primary_key = pk if pk else 'id'
+            primary_key = qb.key_column(table_info, pk if pk else 'id')
             print(f"Using primary key column: {primary_key}")
             
             # Build the delete query using parameterized statements
-            query = f"DELETE FROM {table_name} WHERE {primary_key} = ?"
+            query = qb.delete_by_key(table_info, primary_key)
             print(f"Executing query: {query} with values: [{row_id}]")
             
             try:
@@ -325,6 +311,7 @@ async def delete_test_table_row(
                 cursor.execute(query, [row_id])
                 rows_affected = cursor.rowcount
                 connection.commit()
+                notify_table_write(table_name)
                 
                 if rows_affected == 0:
                     return {"success": False, "error": f"Row {row_id} not found in table {table_name}"}
@@ -344,26 +331,30 @@ async def delete_test_table_row(
         return {"success": False, "error": f"Error deleting row: {str(e)}"}
 
 @router.get("/test-table-data/{table_name}")
-async def get_test_table_data(
+def get_test_table_data(
     table_name: str,
     page: int = 1,
     page_size: int = 50,
     filter_column: str = None,
     filter_value: str = None,
+    filter: List[str] = Query(None),
+    order_by: str = None,
+    columns: str = None,
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
     db: Session = Depends(get_db)
 ):
     """
     Test endpoint to get data from a table without authentication.
+    Accepts the same `filter`, `order_by` and `columns` parameters as GET /data/{table_name}.
     """
     try:
         print(f"\n\n=== GET TEST TABLE DATA ===\nTable: {table_name}\n=========================")
         
-        # Check if the table exists in the database schema
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.get_bind())
-        db_table_names = inspector.get_table_names()
+        bind = db.get_bind()
         
-        if table_name not in db_table_names:
+        # Check if the table exists in the database schema
+        table_info = schema_cache.get_table(bind, table_name)
+        if table_info is None:
             return {
                 "total": 0,
                 "page": page,
@@ -373,42 +364,47 @@ async def get_test_table_data(
                 "error": f"Table '{table_name}' not found in database"
             }
         
-        # Build the query
-        query = f"SELECT * FROM {table_name}"
-        count_query = f"SELECT COUNT(*) AS total FROM {table_name}"
+        # Add filtering and sorting if specified; values are bound parameters
+        clauses, params = build_filters(table_info, filter, filter_column, filter_value)
+        order_keys, descending_columns = parse_order_by(table_info, order_by)
+        if order_keys and not table_info.is_unique_key(order_keys):
+            order_keys += [column for column in table_info.primary_key if column not in order_keys]
         
-        # Add filtering if specified
-        if filter_column and filter_value:
-            query += f" WHERE {filter_column} LIKE '%{filter_value}%'"
-            count_query += f" WHERE {filter_column} LIKE '%{filter_value}%'"
+        # Build the queries, with pagination bound as parameters
+        count_query = qb.count_query(table_info, clauses)
+        select_columns = parse_columns(table_info, columns, table_info.primary_key)
+        query = qb.offset_page_query(table_info, clauses, order_keys, descending_columns, select_columns)
+        page_params = {**params, **qb.page_params(page, page_size)}
         
-        # Add pagination
-        query += f" ORDER BY (SELECT NULL) OFFSET {(page - 1) * page_size} ROWS FETCH NEXT {page_size} ROWS ONLY"
+        def run_queries():
+            with bind.connect() as connection:
+                # Get total count
+                total_count, count_mode = get_row_count(
+                    connection, table_name, count_query, params,
+                    mode=count, filtered=bool(clauses)
+                )
+                
+                # Get paginated data
+                result = connection.execute(text(query), page_params)
+                return total_count, count_mode, list(result.keys()), result.fetchall()
         
-        # Execute the queries
-        with get_engine().connect() as connection:
-            # Get total count
-            result = connection.execute(text(count_query))
-            total_count = result.scalar() or 0
-            
-            # Get paginated data
-            result = connection.execute(text(query))
-            rows = result.fetchall()
-            
-            # Get column names
-            columns = result.keys()
-            
-            # Convert rows to dictionaries
-            data = [dict(zip(columns, row)) for row in rows]
-            
-            # Return data with pagination info
-            return {
-                "total": total_count,
-                "page": page,
-                "page_size": page_size,
-                "total_pages": (total_count + page_size - 1) // page_size if total_count > 0 else 0,
-                "data": data
-            }
+        # Execute the queries; identical requests already in flight share one execution
+        total_count, count_mode, result_columns, rows = single_flight.do(
+            query_key(bind, table_name, count_query, query, params=page_params, extra=count), run_queries
+        )
+        
+        # Convert rows to dictionaries
+        data = [dict(zip(result_columns, row)) for row in rows]
+        
+        # Return data with pagination info
+        return {
+            "total": total_count,
+            "count_mode": count_mode,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total_count + page_size - 1) // page_size if total_count is not None else None,
+            "data": data
+        }
     except Exception as e:
         print(f"Error getting table data: {str(e)}")
         return {
@@ -421,17 +417,13 @@ async def get_test_table_data(
         }
 
 @router.get("/test-tables")
-async def get_test_tables(db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
+def get_test_tables(db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
     """
     Test endpoint to get all tables without authentication.
     """
     try:
-        # Get all tables directly from the database schema
-        from sqlalchemy import inspect
-        inspector = inspect(db.get_bind())
-        
-        # Get all table names from the database
-        db_table_names = inspector.get_table_names()
+        # Get all table names from the cached database schema
+        db_table_names = schema_cache.get_table_names(db.get_bind())
         print(f"Found tables in database: {db_table_names}")
         
         # Filter out system tables and create table objects
@@ -451,7 +443,7 @@ async def get_test_tables(db: Session = Depends(get_db)) -> List[Dict[str, Any]]
         return [{"id": 0, "name": f"Error: {str(e)}", "description": "Error getting tables"}]
 
 @router.get("/db-info")
-async def get_db_info(db: Session = Depends(get_db)):
+def get_db_info(db: Session = Depends(get_db)):
     """
     Debug endpoint to get database information.
     """
@@ -460,7 +452,7 @@ async def get_db_info(db: Session = Depends(get_db)):
         connection_result = "Connection successful"
         
         # Get database tables
-        inspector = inspect(get_engine())
+        inspector = inspect(db.get_bind())
         tables = inspector.get_table_names()
         
         # Get users
@@ -497,3 +489,115 @@ async def get_db_info(db: Session = Depends(get_db)):
             "error": str(e),
             "message": "Error connecting to database"
         }
+
+@router.get("/pool")
+async def get_pool_stats():
+    """
+    Debug endpoint to inspect the database connection pool: checked-out
+    connections, overflow, checkout wait times and reconnects.
+    """
+    from backend.database import connection
+    from backend.database.pool import get_pool_settings
+    engine = connection._engine
+    if engine is None:
+        return {"engine": None, "settings": get_pool_settings(), "swap": connection.engine_status()}
+    return {
+        "engine": "active",
+        "settings": get_pool_settings(),
+        "swap": connection.engine_status(),
+        "stats": engine.pool.stats.snapshot(engine.pool)
+    }
+
+@router.get("/engines")
+async def get_engine_registry_stats():
+    """
+    Debug endpoint to inspect the engines opened for databases selected with
+    the X-Database header, with their pool stats.
+    """
+    from backend.database.engine_registry import engine_registry
+    return engine_registry.stats()
+
+@router.get("/read-replica")
+async def get_read_replica_stats():
+    """
+    Debug endpoint to see how reads were routed between the read replica and
+    the primary (fallbacks, read-your-writes pins).
+    """
+    from backend.database.read_replica import replica_stats
+    return replica_stats()
+
+@router.get("/permissions")
+async def get_permission_index_stats():
+    """
+    Debug endpoint to inspect the in-memory table permission index.
+    """
+    from backend.database.permissions import permission_index
+    return permission_index.stats()
+
+@router.get("/auth")
+async def get_auth_stats():
+    """
+    Debug endpoint to inspect token validation caches (AUTH_MODE=jwt).
+    """
+    from backend.app.auth import token
+    return {
+        "mode": "jwt" if token.auth_enabled() else "dev",
+        "validator": token._validator.stats() if token._validator else None,
+        "users": token.user_cache.stats(),
+    }
+
+@router.get("/single-flight")
+async def get_single_flight_stats():
+    """
+    Debug endpoint to see how many identical concurrent reads were coalesced.
+    """
+    return single_flight.stats()
+
+@router.get("/page-cache")
+async def get_page_cache_stats():
+    """
+    Debug endpoint to inspect the page/ETag response cache.
+    """
+    from backend.app.page_cache import page_cache
+    return page_cache.stats()
+
+@router.get("/schema-cache")
+async def get_schema_cache_stats():
+    """
+    Debug endpoint to inspect schema cache hit/miss counters.
+    """
+    return schema_cache.stats()
+
+@router.get("/count-cache")
+async def get_count_cache_stats():
+    """
+    Debug endpoint to inspect the exact row-count cache.
+    """
+    return count_cache.stats()
+
+@router.get("/facets")
+async def get_facet_cache_stats():
+    """
+    Debug endpoint to inspect the column facet cache.
+    """
+    return facet_cache.stats()
+
+@router.get("/aad-token")
+async def get_aad_token_stats():
+    """
+    Debug endpoint to inspect the cached Azure AD access token
+    (only used when SQL_AUTH_MODE=access_token).
+    """
+    from backend.database.aad_token import current_token_provider
+    provider = current_token_provider()
+    if provider is None:
+        return {"provider": None}
+    return {"provider": "active", "stats": provider.stats()}
+
+@router.post("/schema-cache/invalidate")
+async def invalidate_schema_cache():
+    """
+    Debug endpoint to drop cached schema metadata, e.g. after a DDL change.
+    """
+    schema_cache.invalidate()
+    return {"status": "ok", "stats": schema_cache.stats()}
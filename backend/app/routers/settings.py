@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from anyio import to_thread
 
 router = APIRouter()
 
@@ -14,8 +15,23 @@ class DbSettings(BaseModel):
 # In-memory override (module-level, not persistent)
 override_settings = {}
 
+# Optional request fields mapped to the pool settings they override
+POOL_FIELDS = {
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+    "pool_recycle": "DB_POOL_RECYCLE",
+    "pool_pre_ping": "DB_POOL_PRE_PING",
+}
+
 from fastapi import Request
 
+def reset_secondary_engines():
+    from backend.database.engine_registry import engine_registry
+    from backend.database.read_replica import reset_read_engine
+    engine_registry.clear()
+    reset_read_engine()
+
 @router.post("/settings/db-credentials")
 async def set_db_credentials(request: Request):
     body = await request.body()
@@ -37,20 +53,32 @@ async def set_db_credentials(request: Request):
     override_settings["SQL_SERVER_ENDPOINT"] = data["endpoint"]
     override_settings["SQL_DATABASE_NAME"] = data["database"]
     override_settings["SQL_SERVER_PORT"] = data["port"]
-    # Dispose and reset the SQLAlchemy engine/session so new settings take effect
-    try:
-        from backend.database import connection
-        if hasattr(connection, "_engine") and connection._engine is not None:
-            connection._engine.dispose()
-            connection._engine = None
-            connection._SessionLocal = None
-    except Exception as e:
-        print("[DB-CONN] Warning: Could not dispose engine:", e)
+    # Optional connection pool tuning
+    for key, setting in POOL_FIELDS.items():
+        if data.get(key) not in (None, ""):
+            override_settings[setting] = str(data[key])
+    # Engines opened for other databases (X-Database) and the replica use the
+    # old credentials; disposing them closes connections, so not on the event loop
+    await to_thread.run_sync(reset_secondary_engines)
+    # Build the engine for the new settings in the background and swap it in
+    # once warmed; requests keep using the current engine in the meantime
+    from backend.database import connection
+    if connection._engine is not None and connection.settings_ready():
+        connection.request_engine_swap()
+        return {"status": "ok", "message": "Settings updated, switching database connection", "engine": connection.engine_status()}
+    # No engine yet: the next request builds one. Drop anything cached so far.
+    from backend.database.schema_cache import schema_cache
+    from backend.database.row_counts import count_cache
+    from backend.database.permissions import permission_index
+    schema_cache.invalidate()
+    count_cache.invalidate()
+    permission_index.invalidate()
     return {"status": "ok", "message": "Settings updated"}
 
 @router.get("/settings/db-credentials")
 def get_db_credentials():
     import os
+    from backend.database.pool import DEFAULT_POOL_SETTINGS
     # Helper to determine value and source
     def get_setting(key_env, key_override, default=""):
         if key_override in override_settings:
@@ -65,4 +93,8 @@ def get_db_credentials():
         "endpoint": get_setting("SQL_SERVER_ENDPOINT", "SQL_SERVER_ENDPOINT"),
         "database": get_setting("SQL_DATABASE_NAME", "SQL_DATABASE_NAME"),
         "port": get_setting("SQL_SERVER_PORT", "SQL_SERVER_PORT", "1433"),
+        **{
+            key: get_setting(setting, setting, DEFAULT_POOL_SETTINGS[setting])
+            for key, setting in POOL_FIELDS.items()
+        },
     }
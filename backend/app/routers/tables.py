@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from backend.app.auth.token import get_current_user
-from backend.database.connection import get_db
+from backend.database.read_replica import get_read_db
+from backend.database.schema_cache import schema_cache
+from backend.app.page_cache import page_cache
 from backend.models.models import User, Table, UserTableAccess
-from sqlalchemy import select, join, text
 from typing import List, Dict, Any
 
 # Removed get_mock_table_columns; only real database tables are supported.
@@ -11,9 +12,9 @@ from typing import List, Dict, Any
 router = APIRouter()
 
 @router.get("/")
-async def get_accessible_tables(
+def get_accessible_tables(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all tables that the current user has access to.
@@ -22,47 +23,20 @@ async def get_accessible_tables(
     user_id = current_user["id"]
     print(f"\n\n=== GET TABLES REQUEST ===\nUser: {current_user}\n=========================")
     
-    # Get all tables directly from the database schema
-    from sqlalchemy import inspect
-    inspector = inspect(db.get_bind())
-    
-    # Get all table names from the database
-    db_table_names = inspector.get_table_names()
+    # Read all tables from the cached catalog (loaded in one pass, no per-table queries)
+    catalog = schema_cache.get_catalog(db.get_bind())
+    db_table_names = catalog.table_names
     print(f"Found tables in database: {db_table_names}")
     
     # Filter out system tables and create table objects
     tables = []
     for idx, table_name in enumerate(db_table_names):
         if table_name not in ['alembic_version']:
-            try:
-                print("Using INFORMATION_SCHEMA to detect primary keys...")
-                pk_query = text("""
-                SELECT 
-                    kcu.COLUMN_NAME
-                FROM 
-                    INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
-                JOIN 
-                    INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS kcu
-                    ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
-                WHERE 
-                    tc.TABLE_SCHEMA = 'dbo'          -- Using default schema
-                    AND tc.TABLE_NAME = :table_name  -- Table name parameter
-                    AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
-                """)
-                result = db.execute(pk_query, {"table_name": table_name}).fetchall()
-                tables.append(Table(
-                    id=idx + 1,
-                    name=table_name,
-                    description=f"{table_name.capitalize()} table"
-                ))
-            except Exception as e:
-                print(f"Error occurred while detecting primary keys for table {table_name}: {e}")
-                tables.append(Table(
-                    id=idx + 1,
-                    name=table_name,
-                    description=f"{table_name.capitalize()} table"
-                ))
-    
+            tables.append(Table(
+                id=idx + 1,
+                name=table_name,
+                description=f"{table_name.capitalize()} table"
+            ))
 
     print(f"Final tables list: {[t.name for t in tables]}")
     
@@ -77,68 +51,37 @@ async def get_accessible_tables(
     ]
 
 @router.get("/{table_name}")
-async def get_table_metadata(
+def get_table_metadata(
     table_name: str,
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get metadata for a specific table if the user has access.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     print(f"\n\n=== GET TABLE METADATA ===\nTable: {table_name}\nUser: {current_user}\n=========================")
     
     # Check if the table exists in the database schema
-    from sqlalchemy import inspect
-    inspector = inspect(db.get_bind())
-    db_table_names = inspector.get_table_names()
-    
-    if table_name not in db_table_names:
+    bind = db.get_bind()
+    catalog = schema_cache.get_catalog(bind)
+    cache_key = page_cache.key(bind, "table-metadata", table_name, request, version=catalog.loaded_at)
+    cached = page_cache.get(cache_key, request)
+    if cached is not None:
+        return cached
+    generation = page_cache.generation(table_name, bind)
+    table_info = catalog.get(table_name)
+    
+    if table_info is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Table '{table_name}' not found in database"
         )
     
-    # Get column information from the database schema
-    columns = inspector.get_columns(table_name)
-    
-    # Use INFORMATION_SCHEMA to identify primary key columns
-    print(f"\n\n=== DETECTING PRIMARY KEYS FOR {table_name} ===\n")
-    primary_key_columns = set()
-    
-    try:
-        print("Using INFORMATION_SCHEMA to detect primary keys...")
-        # Use a simplified query to get primary keys
-        pk_query = text("""
-        SELECT 
-            kcu.COLUMN_NAME
-        FROM 
-            INFORMATION_SCHEMA.TABLE_CONSTRAINTS AS tc
-        JOIN 
-            INFORMATION_SCHEMA.KEY_COLUMN_USAGE AS kcu
-            ON tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
-        WHERE 
-            tc.TABLE_SCHEMA = 'dbo'
-            AND tc.TABLE_NAME = :table_name
-            AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
-        """)
-        result = db.execute(pk_query, {"table_name": table_name}).fetchall()
-        print(f"Primary key SQL query result for table '{table_name}': {result}")
-        
-        if result:
-            for row in result:
-                primary_key_columns.add(row[0])
-                print(f"Found primary key column: {row[0]}")
-        else:
-            print(f"No primary key found for table {table_name} using INFORMATION_SCHEMA")
-    except Exception as e:
-        print(f"Error detecting primary keys: {e}")
-    
-    # If no primary keys found, check if any column has primary_key=True in SQLAlchemy metadata
-    if not primary_key_columns:
-        for column in columns:
-            if column.get('primary_key', False):
-                primary_key_columns.add(column['name'])
-                print(f"Found primary key from SQLAlchemy metadata: {column['name']}")
+    # Get column and primary key information from the catalog
+    columns = table_info.columns
+    primary_key_columns = set(table_info.primary_key)
     
     # No hardcoded fallback - rely only on database schema information
     if not primary_key_columns:
@@ -149,21 +92,27 @@ async def get_table_metadata(
     # Create column metadata with primary key information
     column_metadata = []
     for column in columns:
-        is_primary_key = column['name'] in primary_key_columns
+        is_primary_key = column.name in primary_key_columns
         column_metadata.append({
-            "name": column["name"],
-            "type": str(column["type"]),
+            "name": column.name,
+            "type": column.type,
             "primary_key": is_primary_key,
-            "nullable": column["nullable"]
+            "nullable": column.nullable
         })
     
     # Find the index of the table in the list of tables
-    table_index = db_table_names.index(table_name)
+    table_index = catalog.table_names.index(table_name)
     
     # Return table metadata
-    return {
+    return page_cache.put(cache_key, table_name, {
         "id": table_index + 1,  # Simple ID assignment
         "name": table_name,
         "description": f"{table_name.capitalize()} table",
-        "columns": column_metadata
-    }
+        "columns": column_metadata,
+        "foreign_keys": [{
+            "name": fk.name,
+            "columns": fk.columns,
+            "referred_table": fk.referred_table,
+            "referred_columns": fk.referred_columns
+        } for fk in table_info.foreign_keys]
+    }, generation, request)
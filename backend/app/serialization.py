@@ -0,0 +1,132 @@
+import base64
+import datetime
+import decimal
+import functools
+import json
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# orjson (in requirements.txt) encodes the compact format several times
+# faster; the standard library json module is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value):
+    """
+    json.dumps fallback for the value types pyodbc returns from SQL Server.
+    Decimals are emitted as strings so no precision is lost.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def csv_value(value):
+    """Convert a database value to the text written into a CSV cell."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "0x" + bytes(value).hex()
+    return value
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _base64(value):
+    return base64.b64encode(bytes(value)).decode("ascii")
+
+
+# SQL Server types (sys.types.name) whose values are already JSON-native
+_NATIVE_TYPES = {
+    "tinyint", "smallint", "int", "bigint", "bit", "float", "real",
+    "char", "varchar", "nchar", "nvarchar", "text", "ntext", "xml", "sysname",
+}
+
+# Converter per SQL Server type name; types in neither table (geography,
+# hierarchyid, sql_variant, ...) are converted per value by _generic
+_TYPE_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "decimal": str,
+    "numeric": str,
+    "money": str,
+    "smallmoney": str,
+    "date": _isoformat,
+    "time": _isoformat,
+    "datetime": _isoformat,
+    "datetime2": _isoformat,
+    "smalldatetime": _isoformat,
+    "datetimeoffset": _isoformat,
+    "uniqueidentifier": str,
+    "binary": _base64,
+    "varbinary": _base64,
+    "image": _base64,
+    "timestamp": _base64,
+    "rowversion": _base64,
+}
+
+
+def _generic(value):
+    # Unknown column type: decide per value, the way json_default does
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return json_default(value)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_converters(type_names: Tuple[Optional[str], ...]) -> Tuple[Tuple[int, Callable[[Any], Any]], ...]:
+    """
+    Work out once per column layout which columns need converting and how.
+    `type_names` holds the SQL Server type of each result column (None when
+    unknown); returns (column index, converter) pairs for the columns that
+    aren't known to be JSON-native.
+    """
+    converters = []
+    for index, type_name in enumerate(type_names):
+        type_name = (type_name or "").lower()
+        if type_name in _TYPE_CONVERTERS:
+            converters.append((index, _TYPE_CONVERTERS[type_name]))
+        elif type_name not in _NATIVE_TYPES:
+            converters.append((index, _generic))
+    return tuple(converters)
+
+
+def convert_rows(rows: Sequence[Sequence[Any]], converters) -> List[list]:
+    """Rows as JSON-ready lists, converting column by column."""
+    out = [list(row) for row in rows]
+    for index, convert in converters:
+        for row in out:
+            value = row[index]
+            if value is not None:
+                row[index] = convert(value)
+    return out
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode JSON-native data with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_compact(payload: Dict[str, Any], columns: List[str], rows, converters) -> bytes:
+    """
+    Compact wire format: `columns` once and `rows` as arrays, next to the
+    other (JSON-native) fields of payload. Decimals are strings, dates ISO
+    8601 and binary base64, as in the exports.
+    """
+    body = dict(payload)
+    body["columns"] = list(columns)
+    body["rows"] = convert_rows(rows, converters)
+    return dumps(body)
@@ -0,0 +1,72 @@
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BASE_URL = "http://localhost:8000"
+# Slow requests: an exact count plus a large page of a big table, scanned
+# through a substring filter that no index can serve
+SLOW_URL = BASE_URL + "/debug/test-table-data/{table}?page_size=1000&count=exact&filter_column={column}&filter_value=zz"
+FAST_URL = f"{BASE_URL}/debug/test-tables"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    resp = requests.get(url)
+    resp.raise_for_status()
+    return time.perf_counter() - start
+
+
+def run(slow_url, slow_in_flight, fast_requests=200, fast_concurrency=10):
+    """
+    Keep `slow_in_flight` slow queries running while firing fast requests,
+    and report the fast requests' latency distribution.
+    """
+    stop = threading.Event()
+
+    def slow_worker():
+        while not stop.is_set():
+            try:
+                timed_get(slow_url)
+            except Exception as e:
+                print(f"Slow request failed: {e}")
+                time.sleep(0.5)
+
+    slow_threads = [threading.Thread(target=slow_worker, daemon=True) for _ in range(slow_in_flight)]
+    for thread in slow_threads:
+        thread.start()
+    time.sleep(0.5 if slow_in_flight else 0)
+
+    with ThreadPoolExecutor(max_workers=fast_concurrency) as pool:
+        latencies = list(pool.map(lambda _: timed_get(FAST_URL), range(fast_requests)))
+
+    stop.set()
+    print(f"Slow queries in flight: {slow_in_flight}")
+    print(f"  Fast requests: {len(latencies)}")
+    print(f"  p50: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"  p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"  max: {max(latencies) * 1000:.1f} ms")
+    print("-" * 40)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python bench_concurrency.py <large table> <text column> [slow requests in flight ...]")
+        sys.exit(1)
+    slow_url = SLOW_URL.format(table=sys.argv[1], column=sys.argv[2])
+    slow_counts = [int(arg) for arg in sys.argv[3:]] or [0, 4, 8]
+    # Warm the schema cache so fast requests don't include the catalog load
+    timed_get(FAST_URL)
+    for slow_in_flight in slow_counts:
+        run(slow_url, slow_in_flight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import sys
+import time
+import requests
+
+BASE_URL = "http://localhost:8000/data"
+TABLE_NAME = "tabella_1"
+
+
+def bench_export(table_name, fmt):
+    """
+    Stream /data/{table}/export and report time to first byte, rows, bytes
+    and throughput. The response is consumed chunk by chunk, never held in memory.
+    """
+    url = f"{BASE_URL}/{table_name}/export?format={fmt}"
+    start = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+    lines = 0
+    with requests.get(url, stream=True) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            total_bytes += len(chunk)
+            lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+    rows = lines - 1 if fmt == "csv" else lines
+    print(f"Format: {fmt}")
+    print(f"  Time to first byte: {first_byte or 0:.3f}s")
+    print(f"  Rows: {rows}  Bytes: {total_bytes}")
+    print(f"  Elapsed: {elapsed:.2f}s  ({rows / elapsed:,.0f} rows/s, {total_bytes / elapsed / 1e6:.1f} MB/s)")
+    print("-" * 40)
+
+
+def main():
+    table_name = sys.argv[1] if len(sys.argv) > 1 else TABLE_NAME
+    for fmt in ("csv", "ndjson"):
+        bench_export(table_name, fmt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.database import query_builder as qb
+from backend.database.catalog import ColumnInfo, TableInfo
+
+# A typical data entry table, as the catalog would describe it
+TABLE = TableInfo(
+    name="customers",
+    columns=[
+        ColumnInfo("id", "int", 4, 10, 0, False, is_identity=True),
+        ColumnInfo("name", "nvarchar", 200, 0, 0, False),
+        ColumnInfo("email", "nvarchar", 510, 0, 0, True),
+        ColumnInfo("city", "nvarchar", 100, 0, 0, True),
+        ColumnInfo("amount", "decimal", 9, 18, 2, True),
+        ColumnInfo("created_at", "datetime2", 8, 27, 7, False),
+    ],
+    primary_key=["id"],
+)
+SEARCHABLE = ["name", "email", "city"]
+EDITABLE = ["name", "email", "city", "amount"]
+WORDS = ["anna", "berlin", "o'brien", "smith", "@example.com", "42", "north", "%", "zoe"]
+
+
+def legacy_read(page, page_size, filter_column, filter_value):
+    """The statement text the routers used to build, with values inlined."""
+    query = f"SELECT * FROM {TABLE.name}"
+    if filter_column:
+        query += f" WHERE {filter_column} LIKE '%{filter_value}%'"
+    return query + f" ORDER BY (SELECT NULL) OFFSET {(page - 1) * page_size} ROWS FETCH NEXT {page_size} ROWS ONLY"
+
+
+def legacy_update(columns):
+    set_clause = ", ".join(f"{name} = ?" for name in columns)
+    return f"UPDATE {TABLE.name} SET {set_clause} WHERE id = ?"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(1)
+    legacy, built = set(), set()
+    for _ in range(count):
+        page = rng.randint(1, 500)
+        page_size = rng.choice([25, 50, 100])
+        filter_column = rng.choice([None] + SEARCHABLE)
+        filter_value = rng.choice(WORDS) + str(rng.randint(0, 99))
+        legacy.add(legacy_read(page, page_size, filter_column, filter_value))
+        clauses = [qb.contains_filter(TABLE, filter_column, filter_value)[0]] if filter_column else []
+        built.add(qb.count_query(TABLE, clauses))
+        built.add(qb.offset_page_query(TABLE, clauses, TABLE.primary_key))
+
+        # Edits send whichever fields changed, in whatever order the form had them
+        columns = rng.sample(EDITABLE, rng.randint(1, len(EDITABLE)))
+        legacy.add(legacy_update(columns))
+        built.add(qb.update_by_key(TABLE, columns, "id")[0])
+        built.add(qb.insert_row(TABLE, columns, "id")[0])
+    print(f"Requests: {count:,}")
+    print(f"  distinct statements, values inlined: {len(legacy):>8,}")
+    print(f"  distinct statements, query builder:  {len(built):>8,}")
+
+
+if __name__ == "__main__":
+    main()
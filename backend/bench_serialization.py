@@ -0,0 +1,82 @@
+import datetime
+import decimal
+import json
+import os
+import sys
+import time
+from fastapi.encoders import jsonable_encoder
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.serialization import compile_converters, encode_compact, orjson
+
+# Column layout of a typical data entry table, with SQL Server type names
+COLUMNS = [
+    ("id", "int"),
+    ("name", "nvarchar"),
+    ("amount", "decimal"),
+    ("created_at", "datetime2"),
+    ("active", "bit"),
+    ("notes", "nvarchar"),
+    ("checksum", "varbinary"),
+]
+
+
+def make_rows(count):
+    base = datetime.datetime(2024, 1, 1, 8, 30)
+    return [
+        (
+            i,
+            f"Customer {i}",
+            decimal.Decimal(i) / 7,
+            base + datetime.timedelta(minutes=i),
+            i % 2 == 0,
+            None if i % 3 else f"Note for row {i}",
+            # The objects path decodes bytes as UTF-8, so keep them decodable
+            f"{i:08d}".encode("ascii"),
+        )
+        for i in range(count)
+    ]
+
+
+def encode_objects(columns, rows):
+    """The current path: a dict per row through jsonable_encoder and json.dumps."""
+    payload = {"total": len(rows), "data": [dict(zip(columns, row)) for row in rows]}
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+
+def encode_compact_rows(columns, rows):
+    converters = compile_converters(tuple(type_name for _, type_name in COLUMNS))
+    return encode_compact({"total": len(rows)}, columns, rows, converters)
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    columns = [name for name, _ in COLUMNS]
+    print(f"JSON encoder for compact format: {'orjson' if orjson else 'json (orjson not installed)'}")
+    print("-" * 40)
+    for size in sizes:
+        rows = make_rows(size)
+        repeat = max(3, 20000 // size)
+        objects_time, objects_bytes = timed(lambda: encode_objects(columns, rows), repeat)
+        compact_time, compact_bytes = timed(lambda: encode_compact_rows(columns, rows), repeat)
+        print(f"Rows: {size}")
+        print(f"  objects: {objects_time * 1000:8.2f} ms  {objects_bytes:>10,} bytes")
+        print(f"  compact: {compact_time * 1000:8.2f} ms  {compact_bytes:>10,} bytes")
+        print(f"  speedup: {objects_time / compact_time:.1f}x  size: {compact_bytes / objects_bytes:.0%}")
+        print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.database import bulk
+from backend.database.bulk import BatchOperationError, BatchStatements, bulk_delete, group_by_shape, run_batch
+from backend.database.catalog import ColumnInfo, TableInfo
+
+TABLE = TableInfo(
+    name="items",
+    columns=[
+        ColumnInfo("id", "int", 4, 10, 0, False, is_identity=True),
+        ColumnInfo("name", "nvarchar", 100, 0, 0, False),
+        ColumnInfo("qty", "int", 4, 10, 0, True),
+    ],
+    primary_key=["id"],
+)
+
+
+class RecordingCursor:
+    """Stands in for a pyodbc cursor: records each request and fails on demand."""
+
+    def __init__(self, fail_on_request=None):
+        self.requests = []
+        self.fail_on_request = fail_on_request
+        self.rowcount = 1
+        self.deleted = []
+        self._next_id = 100
+
+    def execute(self, sql, params=()):
+        self.requests.append((sql, list(params)))
+        if len(self.requests) == self.fail_on_request:
+            raise RuntimeError("constraint violated")
+
+    def nextset(self):
+        return True
+
+    def fetchall(self):
+        return [(key,) for key in self.deleted]
+
+    def fetchone(self):
+        self._next_id += 1
+        return (self._next_id,)
+
+
+def check_shapes():
+    statements = BatchStatements(TABLE)
+    update = {"op": "update", "key": 1, "values": {"name": "a"}}
+    assert statements.shape(update) == ("update", ("name",))
+    assert statements.sql(statements.shape(update)) == "UPDATE [dbo].[items] SET [name] = ? WHERE [id] = ?"
+    assert statements.params(update) == ["a", 1]
+    # Deletes ignore any values they carry, and null values mean none
+    delete = {"op": "delete", "key": 5, "values": {"name": "x"}}
+    assert statements.shape(delete) == ("delete", ())
+    assert statements.params(delete) == [5]
+    assert statements.shape({"op": "insert", "values": None}) == ("insert", ())
+
+
+def check_runs():
+    operations = (
+        [{"op": "insert", "values": {"name": f"n{i}"}} for i in range(3)]
+        + [{"op": "update", "key": i, "values": {"qty": i}} for i in range(2)]
+        + [{"op": "update", "key": 9, "values": {"name": "z"}}]
+        + [{"op": "delete", "key": i} for i in range(bulk.MAX_BATCH_STATEMENTS + 1)]
+    )
+    cursor = RecordingCursor()
+    results = run_batch(cursor, TABLE, operations)
+    # One request per run of consecutive same-shape operations, split at MAX_BATCH_STATEMENTS
+    assert [sql.count(";\n") + 1 for sql, _ in cursor.requests] == [3, 2, 1, bulk.MAX_BATCH_STATEMENTS, 1]
+    assert cursor.requests[1] == (
+        "UPDATE [dbo].[items] SET [qty] = ? WHERE [id] = ?;\nUPDATE [dbo].[items] SET [qty] = ? WHERE [id] = ?",
+        [0, 0, 1, 1],
+    )
+    assert [result["index"] for result in results] == list(range(len(operations)))
+    assert [result["id"] for result in results[:3]] == [101, 102, 103]
+    assert results[3]["rows_affected"] == 1
+
+
+def check_failure_index():
+    operations = [{"op": "delete", "key": 1}, {"op": "update", "key": 2, "values": {"qty": 0}}]
+    try:
+        run_batch(RecordingCursor(fail_on_request=2), TABLE, operations)
+        raise AssertionError("failure not reported")
+    except BatchOperationError as e:
+        assert e.index == 1
+
+
+def check_bulk_grouping():
+    rows = [{"name": "a"}, {"name": "b", "qty": 1}, {"qty": 2, "name": "c"}, {"name": "d"}]
+    assert group_by_shape(rows) == [(["name"], [0, 3]), (["name", "qty"], [1, 2])]
+
+
+def check_bulk_delete_keys():
+    # Single-column keys may be plain values or {column: value} like composite ones
+    cursor = RecordingCursor()
+    cursor.deleted = [5, 6]
+    assert bulk_delete(cursor, TABLE, [{"id": 5}, 6]) == [5, 6]
+    sql, params = cursor.requests[0]
+    assert sql.startswith("DELETE FROM [dbo].[items] OUTPUT DELETED.[id] WHERE [id] IN (?")
+    # IN lists are padded to the next fixed size with the last key
+    assert params == [5, 6] + [6] * 8
+
+
+CHECKS = [check_shapes, check_runs, check_failure_index, check_bulk_grouping, check_bulk_delete_keys]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok  {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
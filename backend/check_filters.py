@@ -0,0 +1,104 @@
+import datetime
+import decimal
+import os
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.database.catalog import ColumnInfo, TableInfo
+from backend.database.filters import (
+    QueryBuildError, build_filters, compile_filters, parse_columns, parse_filter, parse_order_by
+)
+
+TABLE = TableInfo(
+    name="orders",
+    columns=[
+        ColumnInfo("id", "int", 4, 10, 0, False),
+        ColumnInfo("code", "varchar", 10, 0, 0, False),
+        ColumnInfo("city", "nvarchar", 100, 0, 0, True),
+        ColumnInfo("amount", "decimal", 9, 18, 2, True),
+        ColumnInfo("created", "datetime2", 8, 27, 7, False),
+        ColumnInfo("active", "bit", 1, 1, 0, False),
+    ],
+    primary_key=["id"],
+)
+
+
+def expect_error(expression):
+    try:
+        parse_filter(TABLE, expression)
+    except QueryBuildError as e:
+        return str(e)
+    raise AssertionError(f"filter '{expression}' did not raise QueryBuildError")
+
+
+def check_parsing():
+    assert parse_filter(TABLE, "city:eq:Berlin").values == ["Berlin"]
+    assert parse_filter(TABLE, "id:in:3,5,8").values == [3, 5, 8]
+    assert parse_filter(TABLE, "amount:range:10,").values == [decimal.Decimal("10"), None]
+    assert parse_filter(TABLE, "created:range:2024-01-01,2024-02-01T10:00").values == [
+        datetime.datetime(2024, 1, 1), datetime.datetime(2024, 2, 1, 10, 0)
+    ]
+    assert parse_filter(TABLE, "active:eq:true").values == [True]
+    # Only the first two colons split, so values may contain colons
+    assert parse_filter(TABLE, "city:eq:a:b").values == ["a:b"]
+    assert parse_filter(TABLE, "city:ISNULL").op == "isnull"
+
+
+def check_errors():
+    assert "expected column:op[:value]" in expect_error("id")
+    assert "Unknown filter column 'nope'" in expect_error("nope:eq:1")
+    assert "Unknown filter operator 'foo'" in expect_error("id:foo:1")
+    assert "takes no value" in expect_error("city:isnull:x")
+    assert "needs a value" in expect_error("id:eq")
+    assert "Invalid value 'x'" in expect_error("id:eq:x")
+    assert "out of range" in expect_error("id:eq:99999999999")
+    assert "longer than 10 characters" in expect_error("code:eq:12345678901")
+    assert "needs a character column" in expect_error("id:prefix:1")
+    assert "not supported" in expect_error("active:range:0,1")
+    assert "Invalid range" in expect_error("amount:range:,")
+    assert "At most" in expect_error("id:in:" + ",".join(["1"] * 129))
+
+
+def check_compiled_sql():
+    clauses, params = build_filters(TABLE, ["city:eq:Berlin", "code:prefix:A_1", "id:in:3,5,8", "amount:range:10,"])
+    # Catalog column order, whatever order the request used
+    assert clauses == [
+        "[id] IN (:f0_0, :f0_1, :f0_2, :f0_3)",
+        "[code] LIKE CAST(:f1 AS VARCHAR(8000))",
+        "[city] = :f2",
+        "[amount] >= :f3_lo",
+    ]
+    # IN lists are padded to a power of two; LIKE wildcards in a prefix match literally
+    assert params == {"f0_0": 3, "f0_1": 5, "f0_2": 8, "f0_3": 8, "f1": "A[_]1%", "f2": "Berlin",
+                      "f3_lo": decimal.Decimal("10")}
+    # The same filters in another order give the same statement
+    reordered, _ = build_filters(TABLE, ["amount:range:10,", "id:in:1,2,3", "code:prefix:x", "city:eq:Paris"])
+    assert reordered == clauses
+    assert compile_filters(TABLE, []) == ([], {})
+
+
+def check_order_and_columns():
+    assert parse_order_by(TABLE, "city,-id") == (["city", "id"], ["id"])
+    assert parse_order_by(TABLE, None) == ([], [])
+    try:
+        parse_order_by(TABLE, "id,-id")
+        raise AssertionError("duplicate order_by column accepted")
+    except QueryBuildError:
+        pass
+    assert parse_columns(TABLE, "city, amount", ["id"]) == ["id", "city", "amount"]
+    assert parse_columns(TABLE, "", ["id"]) is None
+
+
+CHECKS = [check_parsing, check_errors, check_compiled_sql, check_order_and_columns]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok  {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import rsa
+from jose import jwk, jwt
+from backend.app.auth.jwt_validator import InvalidToken, JWKSCache, TokenValidator
+
+AUDIENCE = "api://data-entry"
+ISSUER = "https://issuer.example/"
+
+
+def generate_key():
+    """A fresh RSA private key as PEM (rsa ships with python-jose)."""
+    _, private_key = rsa.newkeys(2048)
+    return private_key.save_pkcs1().decode("ascii")
+
+
+KEY = generate_key()
+OTHER_KEY = generate_key()
+
+
+class LocalJWKS:
+    """JWKS fetcher serving the public half of locally generated keys, counting fetches."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"keys": [
+            dict(jwk.construct(pem, "RS256").public_key().to_dict(), kid=kid, use="sig")
+            for kid, pem in self.keys.items()
+        ]}
+
+
+def sign(claims=None, key=KEY, kid="k1", expires_in=600):
+    body = {"aud": AUDIENCE, "iss": ISSUER, "email": "ada@example.com", "exp": int(time.time()) + expires_in}
+    body.update(claims or {})
+    return jwt.encode({k: v for k, v in body.items() if v is not None}, key, algorithm="RS256", headers={"kid": kid})
+
+
+def make_validator(max_cached_tokens=16):
+    fetcher = LocalJWKS({"k1": KEY})
+    validator = TokenValidator(JWKSCache(fetcher=fetcher), audience=AUDIENCE, issuer=ISSUER,
+                               max_cached_tokens=max_cached_tokens)
+    return validator, fetcher
+
+
+def expect_rejected(validator, token, reason):
+    try:
+        validator.validate(token)
+    except InvalidToken:
+        return
+    raise AssertionError(f"token accepted: {reason}")
+
+
+def check_accept_and_cache():
+    validator, fetcher = make_validator()
+    token = sign()
+    assert validator.validate(token)["email"] == "ada@example.com"
+    # The second presentation is served from the verified-token LRU
+    assert validator.validate(token)["email"] == "ada@example.com"
+    stats = validator.stats()
+    assert (stats["hits"], stats["misses"], stats["cached_tokens"]) == (1, 1, 1)
+    # Signing keys are fetched once and reused for other tokens
+    validator.validate(sign({"email": "bob@example.com"}))
+    assert fetcher.calls == 1
+
+
+def check_rejections():
+    validator, _ = make_validator()
+    expect_rejected(validator, sign(expires_in=-60), "expired")
+    expect_rejected(validator, sign({"aud": "api://someone-else"}), "audience mismatch")
+    expect_rejected(validator, sign({"iss": "https://evil.example/"}), "issuer mismatch")
+    expect_rejected(validator, sign(key=OTHER_KEY), "signed with another key under a known kid")
+    expect_rejected(validator, sign({"exp": None}), "no expiry")
+    expect_rejected(validator, "not.a.token", "malformed")
+    stats = validator.stats()
+    assert stats["rejected"] == 6 and stats["cached_tokens"] == 0
+
+
+def check_cache_expiry_and_bound():
+    validator, _ = make_validator(max_cached_tokens=2)
+    for email in ("a@example.com", "b@example.com", "c@example.com"):
+        validator.validate(sign({"email": email}))
+    assert validator.stats()["cached_tokens"] == 2
+    # A cached token stops being accepted once its exp passes (jose still
+    # accepts it during the second exp names, so wait for the one after)
+    short = sign(expires_in=1)
+    validator.validate(short)
+    time.sleep(2.1)
+    expect_rejected(validator, short, "expired while cached")
+
+
+def check_key_rotation():
+    validator, fetcher = make_validator()
+    validator.validate(sign())
+    # A token from a kid published after the last fetch is rejected until the
+    # rate-limited refetch is allowed, then picked up
+    fetcher.keys["k2"] = OTHER_KEY
+    rotated = sign(key=OTHER_KEY, kid="k2")
+    expect_rejected(validator, rotated, "unknown kid within the refetch interval")
+    assert fetcher.calls == 1
+    validator.jwks._last_fetch -= 3600
+    assert validator.validate(rotated)["email"] == "ada@example.com"
+    assert fetcher.calls == 2
+
+
+CHECKS = [check_accept_and_cache, check_rejections, check_cache_expiry_and_bound, check_key_rotation]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok  {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
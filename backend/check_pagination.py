@@ -0,0 +1,85 @@
+import datetime
+import decimal
+import os
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.database.catalog import ColumnInfo
+from backend.database.filters import parse_value
+from backend.database.pagination import build_order_by, build_seek_predicate, decode_cursor, encode_cursor, keyset_cursors
+
+KEY_COLUMNS = [
+    ColumnInfo("created", "datetime2", 8, 27, 7, False),
+    ColumnInfo("day", "date", 3, 10, 0, False),
+    ColumnInfo("amount", "decimal", 9, 18, 2, False),
+    ColumnInfo("guid", "uniqueidentifier", 16, 0, 0, False),
+    ColumnInfo("name", "nvarchar", 100, 0, 0, False),
+    ColumnInfo("id", "int", 4, 10, 0, False),
+]
+
+
+def round_trip(key_values, direction="next"):
+    """Encode and decode a cursor, re-typing strings the way get_table_data does."""
+    values, decoded_direction = decode_cursor(encode_cursor(key_values, direction), len(KEY_COLUMNS))
+    typed = [
+        parse_value(column, value) if isinstance(value, str) else value
+        for column, value in zip(KEY_COLUMNS, values)
+    ]
+    return typed, decoded_direction
+
+
+def check_cursor_round_trip():
+    key = [
+        datetime.datetime(2024, 1, 1, 10, 0, 0, 123000),
+        datetime.date(2024, 1, 1),
+        decimal.Decimal("10.50"),
+        "6f9619ff-8b86-d011-b42d-00c04fc964ff",
+        "O'Brien",
+        42,
+    ]
+    assert round_trip(key) == (key, "next")
+    assert round_trip(key, "prev")[1] == "prev"
+    # Dates travel as ISO 8601, not str()'s space-separated form
+    assert decode_cursor(encode_cursor([key[0]], "next"), 1)[0] == ["2024-01-01T10:00:00.123000"]
+
+
+def check_bad_cursors():
+    for cursor, length in (("not a cursor!", 1), (encode_cursor([1, 2], "next"), 1), (encode_cursor([1], "up"), 1)):
+        try:
+            decode_cursor(cursor, length)
+            raise AssertionError(f"cursor {cursor!r} accepted")
+        except ValueError:
+            pass
+
+
+def check_seek_predicate():
+    predicate, params = build_seek_predicate(["a", "id"], [1, 2], "next", ["a"])
+    assert predicate == "(([a] < :seek_0) OR ([a] = :seek_0 AND [id] > :seek_1))"
+    assert params == {"seek_0": 1, "seek_1": 2}
+    assert build_seek_predicate(["a"], [1], "prev")[0] == "(([a] < :seek_0))"
+    assert build_order_by(["a", "id"], descending_columns=["a"]) == "[a] DESC, [id] ASC"
+    assert build_order_by(["a", "id"], descending=True, descending_columns=["a"]) == "[a] ASC, [id] DESC"
+
+
+def check_page_cursors():
+    rows = [{"id": 1}, {"id": 2}]
+    next_cursor, prev_cursor = keyset_cursors(rows, ["id"], None, True)
+    assert decode_cursor(next_cursor, 1) == ([2], "next") and prev_cursor is None
+    next_cursor, prev_cursor = keyset_cursors(rows, ["id"], "next", False)
+    assert next_cursor is None and decode_cursor(prev_cursor, 1) == ([1], "prev")
+    assert keyset_cursors([], ["id"], "next", False) == (None, None)
+
+
+CHECKS = [check_cursor_round_trip, check_bad_cursors, check_seek_predicate, check_page_cursors]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok  {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.database import query_builder as qb
+from backend.database.catalog import ColumnInfo, TableInfo
+
+TABLE = TableInfo(
+    name="customers",
+    columns=[
+        ColumnInfo("id", "int", 4, 10, 0, False, is_identity=True),
+        ColumnInfo("name", "nvarchar", 200, 0, 0, False),
+        ColumnInfo("email", "nvarchar", 510, 0, 0, True),
+        ColumnInfo("notes", "nvarchar", -1, 0, 0, True),
+        ColumnInfo("odd]name", "int", 4, 10, 0, True),
+    ],
+    primary_key=["id"],
+)
+
+
+def expect_error(build, *args):
+    try:
+        build(*args)
+    except qb.QueryBuildError as e:
+        return str(e)
+    raise AssertionError(f"{build.__name__}{args} did not raise QueryBuildError")
+
+
+def check_identifiers():
+    assert qb.table_source(TABLE) == "[dbo].[customers]"
+    assert qb.column_identifier(TABLE, "odd]name") == "[odd]]name]"
+    assert "Unknown filter column" in expect_error(qb.column_identifier, TABLE, "x]; DROP TABLE t--", "filter column")
+    # Columns come back in catalog order, whatever order the request used
+    assert qb.ordered_columns(TABLE, ["email", "name"]) == ["name", "email"]
+    assert qb.projection(TABLE, ["email"], ["id"]) == ["id", "email"]
+
+
+def check_reads():
+    clause, params = qb.contains_filter(TABLE, "name", "o'brien")
+    assert clause == "[name] LIKE :filter_value"
+    assert params == {"filter_value": "%o'brien%"}
+    assert qb.count_query(TABLE, [clause]) == "SELECT COUNT(*) AS total FROM [dbo].[customers] WHERE [name] LIKE :filter_value"
+    assert qb.offset_page_query(TABLE, [], ["id"]) == (
+        "SELECT * FROM [dbo].[customers] ORDER BY [id] ASC OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+    )
+    assert qb.page_params(3, 50) == {"offset": 100, "limit": 50}
+    assert qb.keyset_page_query(TABLE, [], ["id"]) == "SELECT TOP (:limit) * FROM [dbo].[customers] ORDER BY [id] ASC"
+
+
+def check_one_statement_per_shape():
+    # Values never reach the statement text, so searches and pages share one plan
+    statements = {qb.contains_filter(TABLE, "email", value)[0] for value in ("a", "b'; --", "%", "")}
+    assert len(statements) == 1
+    assert qb.update_by_key(TABLE, ["email", "name"], "id") == qb.update_by_key(TABLE, ["name", "email"], "id")
+
+
+def check_writes():
+    assert qb.update_by_key(TABLE, ["email", "name"], "id") == (
+        "UPDATE [dbo].[customers] SET [name] = ?, [email] = ? WHERE [id] = ?", ["name", "email"]
+    )
+    assert "No columns to update" in expect_error(qb.update_by_key, TABLE, [], "id")
+    assert "Unknown column 'nope'" in expect_error(qb.update_by_key, TABLE, ["nope"], "id")
+    assert qb.insert_row(TABLE, ["name"], "id") == (
+        "INSERT INTO [dbo].[customers] ([name]) OUTPUT INSERTED.[id] VALUES (?)", ["name"]
+    )
+    assert qb.insert_row(TABLE, [], "id") == ("INSERT INTO [dbo].[customers] OUTPUT INSERTED.[id] DEFAULT VALUES", [])
+    assert qb.delete_by_key(TABLE, "id") == "DELETE FROM [dbo].[customers] WHERE [id] = ?"
+    assert qb.key_column(TABLE) == "id"
+    expect_error(qb.key_column, TABLE, "missing")
+
+
+CHECKS = [check_identifiers, check_reads, check_one_statement_per_shape, check_writes]
+
+
+def main():
+    for check in CHECKS:
+        check()
+        print(f"ok  {check.__name__}")
+
+
+if __name__ == "__main__":
+    main()
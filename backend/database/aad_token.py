@@ -0,0 +1,155 @@
+import struct
+import threading
+import time
+from typing import Callable, Optional, Tuple
+import httpx
+
+# pyodbc connection attribute that takes a pre-acquired Azure AD access token
+SQL_COPT_SS_ACCESS_TOKEN = 1256
+
+SQL_TOKEN_SCOPE = "https://database.windows.net/.default"
+DEFAULT_TOKEN_ENDPOINT = "https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+
+# Refresh this many seconds before the token expires
+DEFAULT_REFRESH_MARGIN = 300
+
+
+def token_struct(token: str) -> bytes:
+    """Pack an access token the way the ODBC driver expects it (length-prefixed UTF-16-LE)."""
+    encoded = token.encode("utf-16-le")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+class AccessTokenProvider:
+    """
+    Acquires an Azure AD token for Azure SQL with the client-credentials flow
+    and caches it. A background thread refreshes it refresh_margin seconds
+    ahead of expiry, so new connections never wait on AAD.
+
+    The token endpoint is a format string taking {tenant_id}; pointing it at a
+    local fake issuer makes the provider testable without Azure AD. A custom
+    `fetcher` returning (token, expires_in_seconds) can also be injected.
+    """
+
+    def __init__(self, tenant_id: str, client_id: str, client_secret: str,
+                 token_endpoint: str = DEFAULT_TOKEN_ENDPOINT,
+                 refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+                 fetcher: Optional[Callable[[], Tuple[str, float]]] = None):
+        self.tenant_id = tenant_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_endpoint = token_endpoint.format(tenant_id=tenant_id)
+        self.refresh_margin = refresh_margin
+        self._fetcher = fetcher or self._fetch_from_endpoint
+        # _lock guards the cached token; _fetch_lock makes sure only one
+        # request to the token endpoint is in flight, without holding _lock
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.acquisitions = 0
+        self.cache_hits = 0
+
+    def _fetch_from_endpoint(self) -> Tuple[str, float]:
+        response = httpx.post(self.token_endpoint, data={
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": SQL_TOKEN_SCOPE,
+        }, timeout=30)
+        response.raise_for_status()
+        payload = response.json()
+        return payload["access_token"], float(payload.get("expires_in", 3600))
+
+    def _refresh(self, margin: float) -> str:
+        """
+        Fetch a new token unless the cached one has more than `margin` seconds
+        left (e.g. another thread refreshed it meanwhile). The endpoint is
+        called without holding _lock, so readers keep getting the cached token.
+        """
+        with self._fetch_lock:
+            with self._lock:
+                if self._is_valid(margin):
+                    return self._token
+            token, expires_in = self._fetcher()
+            with self._lock:
+                self._token = token
+                self._expires_at = time.monotonic() + expires_in
+                self.acquisitions += 1
+            print(f"[AAD-TOKEN] Acquired access token, expires in {int(expires_in)}s")
+            return token
+
+    def _is_valid(self, margin: float = 0.0) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at - margin
+
+    def get_token(self) -> str:
+        """
+        Return the cached token while it hasn't expired; renewing it ahead of
+        expiry is left to the background refresh. Only a missing or expired
+        token is acquired here.
+        """
+        with self._lock:
+            if self._is_valid():
+                self.cache_hits += 1
+                return self._token
+        return self._refresh(0.0)
+
+    def start_background_refresh(self):
+        if self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="aad-token-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                wait = self._expires_at - self.refresh_margin - time.monotonic() if self._token else 0
+            if self._stop.wait(max(wait, 1.0) if self._token else 0):
+                break
+            try:
+                self._refresh(self.refresh_margin)
+            except Exception as e:
+                # Keep serving the cached token; retry shortly
+                print(f"[AAD-TOKEN] Background refresh failed: {e}")
+                self._stop.wait(10)
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "token_endpoint": self.token_endpoint,
+                "acquisitions": self.acquisitions,
+                "cache_hits": self.cache_hits,
+                "expires_in_seconds": max(0, int(self._expires_at - time.monotonic())) if self._token else None,
+            }
+
+
+_provider: Optional[AccessTokenProvider] = None
+_provider_key = None
+_provider_lock = threading.Lock()
+
+
+def get_token_provider(tenant_id: str, client_id: str, client_secret: str,
+                       token_endpoint: str = DEFAULT_TOKEN_ENDPOINT) -> AccessTokenProvider:
+    """
+    Return the shared provider for these credentials, replacing (and stopping)
+    the previous one when the credentials change.
+    """
+    global _provider, _provider_key
+    key = (tenant_id, client_id, client_secret, token_endpoint)
+    with _provider_lock:
+        if _provider is None or _provider_key != key:
+            if _provider is not None:
+                _provider.stop()
+            _provider = AccessTokenProvider(tenant_id, client_id, client_secret, token_endpoint)
+            _provider_key = key
+            _provider.start_background_refresh()
+        return _provider
+
+
+def current_token_provider() -> Optional[AccessTokenProvider]:
+    return _provider
@@ -0,0 +1,413 @@
+from typing import Any, Dict, List, Optional, Tuple
+from backend.database.catalog import TableInfo
+from backend.database.pagination import quote_identifier
+
+# Rows sent to the server per fast_executemany/MERGE round trip
+DEFAULT_CHUNK_SIZE = 1000
+
+# Ordinal column added to staging tables to map results back to input rows
+ROW_ORDINAL = "__row"
+
+STAGING_TABLE = "#bulk_stage"
+
+
+class BulkAbort(Exception):
+    """Raised when a batch can't continue and the transaction must be rolled back."""
+
+
+def chunked(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def group_by_shape(rows: List[Dict[str, Any]]) -> List[Tuple[List[str], List[int]]]:
+    """
+    Group row indexes by their column set so each group can share one
+    staging table and one parameterized statement. Groups keep input order;
+    the order of a row's keys doesn't matter.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(index)
+    return [(list(columns), indexes) for columns, indexes in groups.items()]
+
+
+def target_name(table_name: str) -> str:
+    return f"{quote_identifier('dbo')}.{quote_identifier(table_name)}"
+
+
+def savepoint(cursor, name: str):
+    # SAVE TRANSACTION needs an open transaction; pyodbc may not have started one yet
+    cursor.execute(f"IF @@TRANCOUNT = 0 BEGIN TRANSACTION; SAVE TRANSACTION {name}")
+
+
+def rollback_to(cursor, name: str):
+    """
+    Roll back to a savepoint. Raises BulkAbort if the error doomed the whole
+    transaction (XACT_STATE() <> 1), in which case no partial work can be kept.
+    """
+    cursor.execute("SELECT XACT_STATE()")
+    state = cursor.fetchone()[0]
+    if state != 1:
+        raise BulkAbort("The transaction was aborted by the database")
+    cursor.execute(f"ROLLBACK TRANSACTION {name}")
+
+
+def create_staging_table(cursor, table_name: str, columns: List[str]):
+    """
+    Create an empty #temp table with the same column types as the target plus
+    a row ordinal. The dummy outer join stops SELECT INTO from copying the
+    IDENTITY property of the source column.
+    """
+    select_list = ", ".join(f"t.{quote_identifier(column)}" for column in columns)
+    cursor.execute(f"IF OBJECT_ID('tempdb..{STAGING_TABLE}') IS NOT NULL DROP TABLE {STAGING_TABLE}")
+    cursor.execute(
+        f"SELECT TOP 0 CAST(NULL AS int) AS {quote_identifier(ROW_ORDINAL)}, {select_list} "
+        f"INTO {STAGING_TABLE} FROM {target_name(table_name)} AS t "
+        f"LEFT JOIN (SELECT 1 AS x) AS d ON 1 = 0"
+    )
+
+
+def load_staging_table(cursor, columns: List[str], rows: List[Dict[str, Any]], indexes: List[int]):
+    """Truncate the staging table and load one chunk with fast_executemany."""
+    cursor.execute(f"TRUNCATE TABLE {STAGING_TABLE}")
+    column_list = ", ".join(quote_identifier(c) for c in [ROW_ORDINAL] + columns)
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    params = [[index] + [rows[index][column] for column in columns] for index in indexes]
+    cursor.fast_executemany = True
+    try:
+        cursor.executemany(f"INSERT INTO {STAGING_TABLE} ({column_list}) VALUES ({placeholders})", params)
+    finally:
+        cursor.fast_executemany = False
+
+
+def drop_staging_table(cursor):
+    cursor.execute(f"IF OBJECT_ID('tempdb..{STAGING_TABLE}') IS NOT NULL DROP TABLE {STAGING_TABLE}")
+
+
+def _output_clause(pk_columns: List[str], source: Optional[str]) -> str:
+    outputs = [f"{source}.{quote_identifier(ROW_ORDINAL)}"] if source else []
+    outputs += [f"INSERTED.{quote_identifier(column)}" for column in pk_columns]
+    return f"OUTPUT {', '.join(outputs)}" if outputs else ""
+
+
+def merge_insert_from_staging(cursor, table_name: str, columns: List[str], pk_columns: List[str]) -> Dict[int, list]:
+    """
+    Insert every staged row into the target in one statement. MERGE (unlike
+    INSERT ... SELECT) can OUTPUT source columns, which maps each generated
+    key back to the ordinal of the input row it came from.
+    """
+    column_list = ", ".join(quote_identifier(c) for c in columns)
+    source_list = ", ".join(f"src.{quote_identifier(c)}" for c in columns)
+    cursor.execute(
+        f"MERGE INTO {target_name(table_name)} AS target "
+        f"USING {STAGING_TABLE} AS src ON 1 = 0 "
+        f"WHEN NOT MATCHED THEN INSERT ({column_list}) VALUES ({source_list}) "
+        f"{_output_clause(pk_columns, 'src')};"
+    )
+    return {row[0]: list(row[1:]) for row in cursor.fetchall()}
+
+
+def merge_upsert_from_staging(cursor, table_name: str, columns: List[str], pk_columns: List[str],
+                              insert_columns: List[str]) -> Dict[int, list]:
+    """
+    Apply every staged row to the target in one MERGE keyed on the primary
+    key: matched rows are updated, the rest inserted. Returns, per input row
+    ordinal, the MERGE action followed by the primary key values.
+    """
+    on_clause = " AND ".join(f"target.{quote_identifier(c)} = src.{quote_identifier(c)}" for c in pk_columns)
+    update_columns = [c for c in columns if c not in pk_columns]
+    statement = (
+        f"MERGE INTO {target_name(table_name)} WITH (HOLDLOCK) AS target "
+        f"USING {STAGING_TABLE} AS src ON {on_clause} "
+    )
+    if update_columns:
+        set_clause = ", ".join(f"target.{quote_identifier(c)} = src.{quote_identifier(c)}" for c in update_columns)
+        statement += f"WHEN MATCHED THEN UPDATE SET {set_clause} "
+    column_list = ", ".join(quote_identifier(c) for c in insert_columns)
+    source_list = ", ".join(f"src.{quote_identifier(c)}" for c in insert_columns)
+    statement += f"WHEN NOT MATCHED THEN INSERT ({column_list}) VALUES ({source_list}) "
+    outputs = [f"src.{quote_identifier(ROW_ORDINAL)}", "$action"]
+    outputs += [f"INSERTED.{quote_identifier(c)}" for c in pk_columns]
+    cursor.execute(statement + f"OUTPUT {', '.join(outputs)};")
+    return {row[0]: list(row[1:]) for row in cursor.fetchall()}
+
+
+def _apply_in_chunks(cursor, table_name: str, rows: List[Dict[str, Any]], chunk_size: int,
+                     atomic: bool, apply_chunk) -> List[Dict[str, Any]]:
+    """
+    Stage and apply rows chunk by chunk. apply_chunk(columns, indexes) runs the
+    set-based statement for the staged chunk and returns a result per index.
+
+    If a chunk fails and atomic is False, that chunk is rolled back to a
+    savepoint and retried row by row so only the offending rows are reported
+    as errors. With atomic=True the first error is raised to the caller,
+    which is expected to roll back the whole transaction.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    for columns, indexes in group_by_shape(rows):
+        create_staging_table(cursor, table_name, columns)
+        for chunk in chunked(indexes, chunk_size):
+            savepoint(cursor, "bulk_chunk")
+            try:
+                load_staging_table(cursor, columns, rows, chunk)
+                for index, result in apply_chunk(columns, chunk).items():
+                    results[index] = result
+                continue
+            except Exception as chunk_error:
+                if atomic:
+                    raise
+                print(f"[BULK] Chunk failed, retrying row by row: {chunk_error}")
+                rollback_to(cursor, "bulk_chunk")
+            for index in chunk:
+                savepoint(cursor, "bulk_row")
+                try:
+                    load_staging_table(cursor, columns, rows, [index])
+                    results[index] = apply_chunk(columns, [index])[index]
+                except Exception as row_error:
+                    rollback_to(cursor, "bulk_row")
+                    results[index] = {"index": index, "success": False, "error": str(row_error)}
+        drop_staging_table(cursor)
+    return results
+
+
+def bulk_insert(cursor, table_info: TableInfo, rows: List[Dict[str, Any]],
+                chunk_size: int = DEFAULT_CHUNK_SIZE, atomic: bool = False) -> List[Dict[str, Any]]:
+    """
+    Insert rows in chunks through a staging table and return one result per
+    input row, in input order, carrying the generated primary key values.
+    """
+    pk_columns = table_info.primary_key
+
+    def apply_chunk(columns, indexes):
+        keys = merge_insert_from_staging(cursor, table_info.name, columns, pk_columns)
+        results = {}
+        for index in indexes:
+            result = {"index": index, "success": True}
+            result.update(zip(pk_columns, keys.get(index, [])))
+            results[index] = result
+        return results
+
+    return _apply_in_chunks(cursor, table_info.name, rows, chunk_size, atomic, apply_chunk)
+
+
+def bulk_upsert(cursor, table_info: TableInfo, rows: List[Dict[str, Any]],
+                chunk_size: int = DEFAULT_CHUNK_SIZE, atomic: bool = False) -> List[Dict[str, Any]]:
+    """
+    Insert or update rows keyed on the primary key, one MERGE per chunk.
+
+    Every row must carry all primary key columns. When the same key appears
+    more than once only the last row is applied (MERGE can't touch a target
+    row twice); earlier ones are reported as superseded. For identity keys
+    the key is only used for matching, unmatched rows get a generated key.
+    Matched rows with no non-key columns are left as they are ("unchanged").
+    """
+    pk_columns = table_info.primary_key
+    identity_pk = any(table_info.column(c).is_identity for c in pk_columns)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    last_index_for_key: Dict[tuple, int] = {}
+    for index, row in enumerate(rows):
+        last_index_for_key[tuple(str(row[c]) for c in pk_columns)] = index
+    effective = sorted(last_index_for_key.values())
+    for index, row in enumerate(rows):
+        if last_index_for_key[tuple(str(row[c]) for c in pk_columns)] != index:
+            results[index] = {"index": index, "success": True, "action": "superseded"}
+
+    def apply_chunk(columns, indexes):
+        insert_columns = [c for c in columns if not (identity_pk and c in pk_columns)]
+        outputs = merge_upsert_from_staging(cursor, table_info.name, columns, pk_columns, insert_columns)
+        chunk_results = {}
+        for index in indexes:
+            if index not in outputs:
+                # Matched, but the row has only key columns: MERGE had nothing to update
+                result = {"index": index, "success": True, "action": "unchanged"}
+                result.update((c, effective_rows[index][c]) for c in pk_columns)
+                chunk_results[index] = result
+                continue
+            action, *key_values = outputs[index]
+            result = {"index": index, "success": True, "action": "inserted" if action == "INSERT" else "updated"}
+            result.update(zip(pk_columns, key_values))
+            chunk_results[index] = result
+        return chunk_results
+
+    effective_rows = [rows[index] for index in effective]
+    effective_results = _apply_in_chunks(cursor, table_info.name, effective_rows, chunk_size, atomic, apply_chunk)
+    for position, result in enumerate(effective_results):
+        result["index"] = effective[position]
+        results[effective[position]] = result
+    return results
+
+
+# Chunk sizes for IN (...) lists; short chunks are padded up to the next
+# size so only a handful of distinct statements ever reach the plan cache
+IN_LIST_SIZES = (10, 100, 1000)
+
+
+def _padded(values: List[Any]) -> List[Any]:
+    size = next(size for size in IN_LIST_SIZES if size >= len(values))
+    return values + [values[-1]] * (size - len(values))
+
+
+def bulk_delete(cursor, table_info: TableInfo, keys: List[Any]) -> List[Any]:
+    """
+    Delete rows by primary key and return the keys that were actually deleted.
+
+    Single-column keys (plain values, or dicts like composite keys) are
+    deleted with chunked IN (...) lists. Composite keys (passed as dicts) are
+    staged into a #temp table and deleted with a join.
+    """
+    pk_columns = table_info.primary_key
+    deleted: List[Any] = []
+    outputs = ", ".join(f"DELETED.{quote_identifier(c)}" for c in pk_columns)
+
+    if len(pk_columns) == 1:
+        pk = quote_identifier(pk_columns[0])
+        values = [key_values(table_info, key)[0] for key in keys]
+        for chunk in chunked(values, IN_LIST_SIZES[-1]):
+            params = _padded(list(chunk))
+            placeholders = ", ".join("?" for _ in params)
+            cursor.execute(
+                f"DELETE FROM {target_name(table_info.name)} OUTPUT {outputs} WHERE {pk} IN ({placeholders})",
+                params
+            )
+            deleted.extend(row[0] for row in cursor.fetchall())
+        return deleted
+
+    rows = [{c: key[c] for c in pk_columns} for key in keys]
+    create_staging_table(cursor, table_info.name, pk_columns)
+    on_clause = " AND ".join(f"target.{quote_identifier(c)} = src.{quote_identifier(c)}" for c in pk_columns)
+    for chunk in chunked(list(range(len(rows))), DEFAULT_CHUNK_SIZE):
+        load_staging_table(cursor, pk_columns, rows, chunk)
+        cursor.execute(
+            f"DELETE target OUTPUT {outputs} FROM {target_name(table_info.name)} AS target "
+            f"JOIN {STAGING_TABLE} AS src ON {on_clause}"
+        )
+        deleted.extend(dict(zip(pk_columns, row)) for row in cursor.fetchall())
+    drop_staging_table(cursor)
+    return deleted
+
+
+# SQL Server accepts at most 2100 parameters per request
+MAX_BATCH_PARAMS = 2000
+# Statements sent together in one round trip for a run of same-shape operations
+MAX_BATCH_STATEMENTS = 50
+
+BATCH_OPERATIONS = ("insert", "update", "delete")
+
+
+class BatchOperationError(Exception):
+    """A batch operation failed; `index` is its position in the request."""
+
+    def __init__(self, index: int, error: Exception):
+        super().__init__(str(error))
+        self.index = index
+
+
+def operation_values(operation: Dict[str, Any]) -> Dict[str, Any]:
+    """The column values an operation writes; deletes write none, whatever they carry."""
+    if operation["op"] == "delete":
+        return {}
+    return operation.get("values") or {}
+
+
+def key_values(table_info: TableInfo, key: Any) -> List[Any]:
+    """Normalize a scalar or {column: value} key into primary key order."""
+    if isinstance(key, dict):
+        return [key[c] for c in table_info.primary_key]
+    return [key]
+
+
+class BatchStatements:
+    """
+    Builds and caches the SQL text for each operation shape, i.e. the
+    operation type plus the columns it touches. Operations of the same shape
+    share one parameterized statement (and so one cached plan per run length).
+    """
+
+    def __init__(self, table_info: TableInfo):
+        self.table_info = table_info
+        self._statements: Dict[tuple, str] = {}
+
+    @staticmethod
+    def shape(operation: Dict[str, Any]) -> tuple:
+        return (operation["op"], tuple(operation_values(operation).keys()))
+
+    def sql(self, shape: tuple) -> str:
+        if shape not in self._statements:
+            self._statements[shape] = self._build(*shape)
+        return self._statements[shape]
+
+    def _build(self, op: str, columns: tuple) -> str:
+        table = target_name(self.table_info.name)
+        pk_columns = self.table_info.primary_key
+        where = " AND ".join(f"{quote_identifier(c)} = ?" for c in pk_columns)
+        if op == "insert":
+            column_list = ", ".join(quote_identifier(c) for c in columns)
+            placeholders = ", ".join("?" for _ in columns)
+            return f"INSERT INTO {table} ({column_list}) {_output_clause(pk_columns, None)} VALUES ({placeholders})"
+        if op == "update":
+            set_clause = ", ".join(f"{quote_identifier(c)} = ?" for c in columns)
+            return f"UPDATE {table} SET {set_clause} WHERE {where}"
+        return f"DELETE FROM {table} WHERE {where}"
+
+    def params(self, operation: Dict[str, Any]) -> List[Any]:
+        values = list(operation_values(operation).values())
+        if operation["op"] == "insert":
+            return values
+        return values + key_values(self.table_info, operation["key"])
+
+
+def _runs(operations: List[Dict[str, Any]], statements: BatchStatements):
+    """Split operations into runs of consecutive same-shape operations."""
+    run: List[int] = []
+    run_shape = None
+    run_params = 0
+    for index, operation in enumerate(operations):
+        shape = statements.shape(operation)
+        param_count = len(statements.params(operation))
+        if run and (shape != run_shape or len(run) >= MAX_BATCH_STATEMENTS
+                    or run_params + param_count > MAX_BATCH_PARAMS):
+            yield run_shape, run
+            run, run_params = [], 0
+        run.append(index)
+        run_shape = shape
+        run_params += param_count
+    if run:
+        yield run_shape, run
+
+
+def run_batch(cursor, table_info: TableInfo, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Execute an ordered list of insert/update/delete operations on one cursor.
+
+    Consecutive operations with the same shape are sent as one multi-statement
+    request, reading each statement's outcome with nextset(). The caller owns
+    the transaction; on the first failure BatchOperationError is raised with
+    the index of the failing operation so everything can be rolled back.
+    """
+    statements = BatchStatements(table_info)
+    pk_columns = table_info.primary_key
+    results: List[Dict[str, Any]] = []
+
+    for shape, run in _runs(operations, statements):
+        statement = statements.sql(shape)
+        sql = ";\n".join([statement] * len(run))
+        params = [p for index in run for p in statements.params(operations[index])]
+        position = 0
+        try:
+            cursor.execute(sql, params)
+            for position, index in enumerate(run):
+                if position:
+                    cursor.nextset()
+                result = {"index": index, "op": shape[0], "success": True}
+                if shape[0] == "insert":
+                    if pk_columns:
+                        row = cursor.fetchone()
+                        result.update(zip(pk_columns, row or []))
+                else:
+                    result["rows_affected"] = cursor.rowcount
+                results.append(result)
+        except Exception as e:
+            raise BatchOperationError(run[position], e)
+    return results
@@ -0,0 +1,205 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from sqlalchemy import text
+
+# Types whose sys.columns.max_length is measured in bytes of UTF-16 characters
+_UNICODE_TYPES = {"nchar", "nvarchar"}
+_LENGTH_TYPES = {"char", "varchar", "nchar", "nvarchar", "binary", "varbinary"}
+_PRECISION_TYPES = {"decimal", "numeric"}
+# Names SQLAlchemy's reflection used to report, kept for API compatibility
+_TYPE_ALIASES = {"int": "INTEGER"}
+
+# Columns, primary keys and identity flags for every table of a schema
+COLUMNS_QUERY = text("""
+SELECT
+    t.name AS table_name,
+    c.name AS column_name,
+    c.column_id,
+    ty.name AS type_name,
+    c.max_length,
+    c.precision,
+    c.scale,
+    c.is_nullable,
+    c.is_identity,
+    c.is_computed,
+    ic.key_ordinal AS pk_ordinal
+FROM sys.tables AS t
+JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+JOIN sys.columns AS c ON c.object_id = t.object_id
+JOIN sys.types AS ty ON ty.user_type_id = c.user_type_id
+LEFT JOIN sys.indexes AS i
+    ON i.object_id = t.object_id AND i.is_primary_key = 1
+LEFT JOIN sys.index_columns AS ic
+    ON ic.object_id = i.object_id AND ic.index_id = i.index_id AND ic.column_id = c.column_id
+WHERE s.name = :schema AND t.is_ms_shipped = 0
+ORDER BY t.name, c.column_id
+""")
+
+# Foreign keys of every table of a schema
+FOREIGN_KEYS_QUERY = text("""
+SELECT
+    fk.name AS constraint_name,
+    tp.name AS table_name,
+    cp.name AS column_name,
+    tr.name AS referred_table,
+    cr.name AS referred_column
+FROM sys.foreign_keys AS fk
+JOIN sys.foreign_key_columns AS fkc ON fkc.constraint_object_id = fk.object_id
+JOIN sys.tables AS tp ON tp.object_id = fk.parent_object_id
+JOIN sys.schemas AS s ON s.schema_id = tp.schema_id
+JOIN sys.columns AS cp
+    ON cp.object_id = fkc.parent_object_id AND cp.column_id = fkc.parent_column_id
+JOIN sys.tables AS tr ON tr.object_id = fk.referenced_object_id
+JOIN sys.columns AS cr
+    ON cr.object_id = fkc.referenced_object_id AND cr.column_id = fkc.referenced_column_id
+WHERE s.name = :schema
+ORDER BY tp.name, fk.name, fkc.constraint_column_id
+""")
+
+# Unique (non-filtered) indexes and constraints, usable as seek keys
+UNIQUE_INDEXES_QUERY = text("""
+SELECT
+    t.name AS table_name,
+    i.name AS index_name,
+    c.name AS column_name
+FROM sys.indexes AS i
+JOIN sys.tables AS t ON t.object_id = i.object_id
+JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+JOIN sys.index_columns AS ic
+    ON ic.object_id = i.object_id AND ic.index_id = i.index_id AND ic.is_included_column = 0
+JOIN sys.columns AS c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE s.name = :schema AND i.is_unique = 1 AND i.has_filter = 0
+ORDER BY t.name, i.name, ic.key_ordinal
+""")
+
+
+@dataclass
+class ColumnInfo:
+    name: str
+    type_name: str
+    max_length: int
+    precision: int
+    scale: int
+    nullable: bool
+    is_identity: bool = False
+    is_computed: bool = False
+
+    @property
+    def type(self) -> str:
+        """SQL type rendered the way the API has always reported it, e.g. NVARCHAR(50)."""
+        type_name = _TYPE_ALIASES.get(self.type_name, self.type_name.upper())
+        if self.type_name in _LENGTH_TYPES:
+            if self.max_length == -1:
+                return f"{type_name}(max)"
+            length = self.max_length // 2 if self.type_name in _UNICODE_TYPES else self.max_length
+            return f"{type_name}({length})"
+        if self.type_name in _PRECISION_TYPES:
+            return f"{type_name}({self.precision}, {self.scale})"
+        return type_name
+
+
+@dataclass
+class ForeignKeyInfo:
+    name: str
+    columns: List[str]
+    referred_table: str
+    referred_columns: List[str]
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    primary_key: List[str] = field(default_factory=list)
+    foreign_keys: List[ForeignKeyInfo] = field(default_factory=list)
+    unique_keys: List[List[str]] = field(default_factory=list)
+
+    def column(self, name: str) -> Optional[ColumnInfo]:
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+    def is_unique_key(self, column_names: List[str]) -> bool:
+        """True if the columns are covered by the primary key or a unique index."""
+        wanted = set(column_names)
+        return any(set(key) <= wanted for key in [self.primary_key] + self.unique_keys if key)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+
+@dataclass
+class Catalog:
+    schema: str
+    tables: Dict[str, TableInfo]
+    loaded_at: float
+
+    @property
+    def table_names(self) -> List[str]:
+        return list(self.tables)
+
+    def get(self, table_name: str) -> Optional[TableInfo]:
+        return self.tables.get(table_name)
+
+
+def load_catalog(connection, schema: str = "dbo") -> Catalog:
+    """
+    Load tables, columns, primary keys, identity flags, foreign keys and unique
+    indexes for a whole schema using set-based queries against the sys.*
+    catalog views.
+    """
+    tables: Dict[str, TableInfo] = {}
+    pk_ordinals: Dict[str, list] = {}
+
+    for row in connection.execute(COLUMNS_QUERY, {"schema": schema}):
+        table = tables.get(row.table_name)
+        if table is None:
+            table = tables[row.table_name] = TableInfo(name=row.table_name)
+            pk_ordinals[row.table_name] = []
+        table.columns.append(ColumnInfo(
+            name=row.column_name,
+            type_name=row.type_name,
+            max_length=row.max_length,
+            precision=row.precision,
+            scale=row.scale,
+            nullable=bool(row.is_nullable),
+            is_identity=bool(row.is_identity),
+            is_computed=bool(row.is_computed),
+        ))
+        if row.pk_ordinal:
+            pk_ordinals[row.table_name].append((row.pk_ordinal, row.column_name))
+
+    for table_name, ordinals in pk_ordinals.items():
+        tables[table_name].primary_key = [name for _, name in sorted(ordinals)]
+
+    foreign_keys: Dict[tuple, ForeignKeyInfo] = {}
+    for row in connection.execute(FOREIGN_KEYS_QUERY, {"schema": schema}):
+        if row.table_name not in tables:
+            continue
+        key = (row.table_name, row.constraint_name)
+        fk = foreign_keys.get(key)
+        if fk is None:
+            fk = foreign_keys[key] = ForeignKeyInfo(
+                name=row.constraint_name,
+                columns=[],
+                referred_table=row.referred_table,
+                referred_columns=[]
+            )
+            tables[row.table_name].foreign_keys.append(fk)
+        fk.columns.append(row.column_name)
+        fk.referred_columns.append(row.referred_column)
+
+    unique_keys: Dict[tuple, List[str]] = {}
+    for row in connection.execute(UNIQUE_INDEXES_QUERY, {"schema": schema}):
+        if row.table_name not in tables:
+            continue
+        key = (row.table_name, row.index_name)
+        if key not in unique_keys:
+            unique_keys[key] = []
+            tables[row.table_name].unique_keys.append(unique_keys[key])
+        unique_keys[key].append(row.column_name)
+
+    return Catalog(schema=schema, tables=tables, loaded_at=time.time())
@@ -1,6 +1,9 @@
 import os
+import re
+import threading
+import time
 import pyodbc
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -18,13 +21,26 @@ load_dotenv()
 get_env = lambda key, default=None: override_settings.get(key) or os.getenv(key, default)
 
 
-from fastapi import HTTPException
+from typing import Optional
+from fastapi import HTTPException, Request
 
 Base = declarative_base()
 metadata = MetaData()
 
 _engine = None
 _SessionLocal = None
+_engine_lock = threading.Lock()
+_engine_generation = 0
+
+# Background engine rebuilds (see request_engine_swap)
+_swap_lock = threading.Lock()
+_swap_pending = False
+_swap_thread = None
+_swap_status = {"state": "idle", "last_error": None, "last_swap_seconds": None, "swaps": 0}
+
+# Request header selecting a database other than the configured default
+DATABASE_HEADER = "X-Database"
+DATABASE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-\. ]{1,128}$")
 
 REQUIRED_SETTINGS = ["SQL_SERVER_ENDPOINT", "AZURE_TENANT_ID", "AZURE_CLIENT_SECRET"]
 
@@ -36,53 +52,244 @@ def normalize_bool(val):
         return "yes"
     return "no"
 
-def get_engine():
-    global _engine, _SessionLocal
-    if not settings_ready():
-        raise HTTPException(status_code=503, detail="Database settings not configured. Please set SQL_SERVER_ENDPOINT, AZURE_TENANT_ID, and AZURE_CLIENT_SECRET.")
-    if _engine is None:
-        server = get_env('SQL_SERVER_ENDPOINT')
-        port = get_env('SQL_SERVER_PORT') or '1433'
-        database = get_env('SQL_DATABASE_NAME') or ''
-        client_id = get_env('AZURE_CLIENT_ID') or ''
-        tenant_id = get_env('AZURE_TENANT_ID') or ''
-        client_secret = get_env('AZURE_CLIENT_SECRET') or ''
-        encrypt = normalize_bool(get_env('SQL_ENCRYPT', 'yes'))
-        trust_cert = normalize_bool(get_env('SQL_TRUST_CERTIFICATE', 'no'))
-        timeout = get_env('SQL_TIMEOUT', '30')
-        conn_str = (
-            f"Driver={{ODBC Driver 18 for SQL Server}};"
-            f"Server={server},{port};"
-            f"Database={database};"
+def get_threadpool_size():
+    """
+    Number of worker threads for sync route handlers. Every handler that
+    touches the database holds a pooled connection while it runs, so the
+    default matches the pool capacity (pool size + max overflow).
+    """
+    from backend.database.pool import get_pool_settings
+    pool_settings = get_pool_settings()
+    default = pool_settings["pool_size"] + pool_settings["max_overflow"]
+    return int(get_env('DB_THREADPOOL_SIZE', default))
+
+def get_connection_config():
+    """Snapshot of every setting that goes into building an engine."""
+    from backend.database.pool import get_pool_settings
+    return {
+        "server": get_env('SQL_SERVER_ENDPOINT'),
+        "port": get_env('SQL_SERVER_PORT') or '1433',
+        "database": get_env('SQL_DATABASE_NAME') or '',
+        "client_id": get_env('AZURE_CLIENT_ID') or '',
+        "tenant_id": get_env('AZURE_TENANT_ID') or '',
+        "client_secret": get_env('AZURE_CLIENT_SECRET') or '',
+        "encrypt": normalize_bool(get_env('SQL_ENCRYPT', 'yes')),
+        "trust_cert": normalize_bool(get_env('SQL_TRUST_CERTIFICATE', 'no')),
+        "timeout": get_env('SQL_TIMEOUT', '30'),
+        "auth_mode": (get_env('SQL_AUTH_MODE', 'service_principal') or '').lower(),
+        "token_endpoint": get_env('AZURE_TOKEN_ENDPOINT'),
+        "pool": get_pool_settings(),
+    }
+
+def create_db_engine(config):
+    """Build a new engine (and its instrumented pool) from a connection config."""
+    client_id = config["client_id"]
+    tenant_id = config["tenant_id"]
+    client_secret = config["client_secret"]
+    # SQL_AUTH_MODE=access_token: acquire the AAD token ourselves (cached and
+    # refreshed in the background) instead of letting the driver log in
+    # with the service principal on every new physical connection
+    use_access_token = config["auth_mode"] == 'access_token'
+    if use_access_token:
+        auth_part = ""
+        masked_auth_part = ""
+    else:
+        auth_part = (
             f"UID={client_id}@{tenant_id};"
-            f"PWD=***;"  # Masked in log
+            f"PWD={client_secret};"
             f"Authentication=ActiveDirectoryServicePrincipal;"
-            f"Encrypt={encrypt};"
-            f"TrustServerCertificate={trust_cert};"
-            f"Connection Timeout={timeout};"
         )
-        print("[DB-CONN] Connection string (masked):", conn_str.replace('PWD=***;', 'PWD=***;'))
-        # Build the real connection string for SQLAlchemy
-        real_conn_str = (
-            f"Driver={{ODBC Driver 18 for SQL Server}};"
-            f"Server={server},{port};"
-            f"Database={database};"
+        masked_auth_part = (
             f"UID={client_id}@{tenant_id};"
-            f"PWD={client_secret};"
+            f"PWD=***;"  # Masked in log
             f"Authentication=ActiveDirectoryServicePrincipal;"
-            f"Encrypt={encrypt};"
-            f"TrustServerCertificate={trust_cert};"
-            f"Connection Timeout={timeout};"
         )
-        _engine = create_engine(f"mssql+pyodbc:///?odbc_connect={real_conn_str}")
-        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
-    return _engine
+    base_conn_str = (
+        f"Driver={{ODBC Driver 18 for SQL Server}};"
+        f"Server={config['server']},{config['port']};"
+        f"Database={config['database']};"
+    )
+    options = (
+        f"Encrypt={config['encrypt']};"
+        f"TrustServerCertificate={config['trust_cert']};"
+        f"Connection Timeout={config['timeout']};"
+    )
+    if config.get("read_only"):
+        # Routes the connection to a readable secondary / read scale-out replica
+        options += "ApplicationIntent=ReadOnly;"
+    print("[DB-CONN] Connection string (masked):", base_conn_str + masked_auth_part + options)
+    # Build the real connection string for SQLAlchemy
+    real_conn_str = base_conn_str + auth_part + options
+    from backend.database.pool import InstrumentedQueuePool, instrument_pool
+    pool_settings = config["pool"]
+    print("[DB-CONN] Pool settings:", pool_settings)
+    engine = create_engine(
+        f"mssql+pyodbc:///?odbc_connect={real_conn_str}",
+        poolclass=InstrumentedQueuePool,
+        **pool_settings
+    )
+    instrument_pool(engine.pool)
+    # Caches (schema, row counts) keep separate entries per database
+    engine.database_key = f"{config['server']}/{config['database']}"
+    if use_access_token:
+        from backend.database.aad_token import (
+            get_token_provider, token_struct, SQL_COPT_SS_ACCESS_TOKEN, DEFAULT_TOKEN_ENDPOINT
+        )
+        token_provider = get_token_provider(
+            tenant_id, client_id, client_secret,
+            config["token_endpoint"] or DEFAULT_TOKEN_ENDPOINT
+        )
+
+        @event.listens_for(engine, "do_connect")
+        def provide_token(dialect, conn_rec, cargs, cparams):
+            cparams["attrs_before"] = {SQL_COPT_SS_ACCESS_TOKEN: token_struct(token_provider.get_token())}
+    return engine
+
+def warm_engine(engine, connections=None):
+    """
+    Open (and validate) a few pooled connections up front, so the first
+    requests served by a freshly built engine don't pay for the AAD login
+    and TLS handshake.
+    """
+    if connections is None:
+        connections = int(get_env('DB_POOL_WARM_CONNECTIONS', '2'))
+    opened = []
+    try:
+        for _ in range(max(connections, 1)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in opened:
+            conn.close()
+
+def get_engine():
+    global _engine, _SessionLocal, _engine_generation
+    if not settings_ready():
+        raise HTTPException(status_code=503, detail="Database settings not configured. Please set SQL_SERVER_ENDPOINT, AZURE_TENANT_ID, and AZURE_CLIENT_SECRET.")
+    engine = _engine
+    if engine is not None:
+        return engine
+    # Double-checked: concurrent first requests build exactly one engine
+    with _engine_lock:
+        if _engine is None:
+            engine = create_db_engine(get_connection_config())
+            _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            _engine = engine
+            _engine_generation += 1
+        return _engine
+
+def _install_engine(engine):
+    """Atomically replace the current engine; returns the one it replaced."""
+    global _engine, _SessionLocal, _engine_generation
+    with _engine_lock:
+        old_engine = _engine
+        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _engine = engine
+        _engine_generation += 1
+    return old_engine
+
+def request_engine_swap():
+    """
+    Rebuild the engine from the current settings in the background and swap
+    it in once it has been warmed. Until then requests keep using the old
+    engine. Several calls while a swap is running collapse into one more
+    rebuild with the latest settings.
+    """
+    global _swap_pending, _swap_thread
+    with _swap_lock:
+        _swap_pending = True
+        _swap_status["state"] = "pending"
+        if _swap_thread is None:
+            _swap_thread = threading.Thread(target=_swap_worker, name="engine-swap", daemon=True)
+            _swap_thread.start()
+
+def _swap_worker():
+    global _swap_pending, _swap_thread
+    while True:
+        with _swap_lock:
+            if not _swap_pending:
+                _swap_thread = None
+                return
+            _swap_pending = False
+            _swap_status["state"] = "building"
+        start = time.perf_counter()
+        new_engine = None
+        try:
+            new_engine = create_db_engine(get_connection_config())
+            warm_engine(new_engine)
+        except Exception as e:
+            # Keep serving from the old engine; the new settings can be retried
+            print("[DB-CONN] Engine swap failed, keeping current engine:", e)
+            if new_engine is not None:
+                new_engine.dispose()
+            with _swap_lock:
+                _swap_status.update({"state": "failed", "last_error": str(e)})
+            continue
+        old_engine = _install_engine(new_engine)
+        # Cached schema metadata and row counts belong to the previous database
+        from backend.database.schema_cache import schema_cache
+        from backend.database.row_counts import count_cache
+        from backend.database.permissions import permission_index
+        schema_cache.invalidate()
+        count_cache.invalidate()
+        permission_index.invalidate()
+        if old_engine is not None:
+            # Closes idle connections now; connections still checked out by
+            # in-flight requests finish their work and are closed on checkin
+            old_engine.dispose()
+        elapsed = time.perf_counter() - start
+        print(f"[DB-CONN] Engine swapped in {elapsed:.2f}s (generation {_engine_generation})")
+        with _swap_lock:
+            _swap_status.update({
+                "state": "idle" if not _swap_pending else "pending",
+                "last_error": None,
+                "last_swap_seconds": round(elapsed, 3),
+                "swaps": _swap_status["swaps"] + 1,
+            })
+
+def engine_status():
+    with _swap_lock:
+        return {"generation": _engine_generation, **_swap_status}
+
+def database_key(bind) -> str:
+    """Key identifying the database behind an engine or connection, for per-database caches."""
+    return getattr(getattr(bind, "engine", bind), "database_key", "default")
+
+def get_requested_database(request: Optional[Request]) -> Optional[str]:
+    """
+    Database named in the X-Database header, or None for the configured
+    default. Any other database must be listed in ALLOWED_DATABASES (unset
+    means none are): the service principal can usually reach more databases
+    on the server than the app should expose. Names are also validated
+    because they end up in the ODBC connection string.
+    """
+    if request is None:
+        return None
+    database = (request.headers.get(DATABASE_HEADER) or "").strip()
+    if not database or database == (get_env('SQL_DATABASE_NAME') or ''):
+        return None
+    if not DATABASE_NAME_PATTERN.match(database):
+        raise HTTPException(status_code=400, detail=f"Invalid database name: {database}")
+    allowed = [name.strip() for name in (get_env('ALLOWED_DATABASES') or '').split(',') if name.strip()]
+    if database not in allowed:
+        raise HTTPException(status_code=403, detail=f"Database {database} is not allowed")
+    return database
 
-def get_db():
+def get_db(request: Request = None):
     if not settings_ready():
         raise HTTPException(status_code=503, detail="Database settings not configured. Please set SQL_SERVER_ENDPOINT, AZURE_TENANT_ID, and AZURE_CLIENT_SECRET.")
-    get_engine()
-    db = _SessionLocal()
+    database = get_requested_database(request)
+    if database is None:
+        get_engine()
+        session_factory = _SessionLocal
+    else:
+        # Same server and credentials, different database: served from the engine registry
+        from backend.database.engine_registry import engine_registry
+        config = get_connection_config()
+        config["database"] = database
+        session_factory = engine_registry.get(config).session_factory
+    db = session_factory()
     try:
         yield db
     finally:
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import sessionmaker
+from backend.database.connection import get_env, create_db_engine
+
+# How many per-database engines stay open at once
+DEFAULT_ENGINE_CACHE_SIZE = 8
+# Seconds an engine may go unused before it is disposed
+DEFAULT_ENGINE_IDLE_TIMEOUT = 900
+
+
+def engine_key(config):
+    """
+    Registry key for a connection config: server, port, database and the
+    credentials. The secret is hashed so it never shows up in stats or logs.
+    """
+    secret_hash = hashlib.sha256(config["client_secret"].encode("utf-8")).hexdigest()[:16]
+    return (config["server"], config["port"], config["database"],
+            config["tenant_id"], config["client_id"], secret_hash)
+
+
+class EngineEntry:
+    def __init__(self, engine):
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class EngineRegistry:
+    """
+    Engines for the databases selected per request (X-Database header), each
+    with its own connection pool. At most DB_ENGINE_CACHE_SIZE engines stay
+    open; the least recently used one is disposed when another is needed, and
+    engines unused for DB_ENGINE_IDLE_TIMEOUT seconds are disposed as well.
+
+    The default database is not kept here; it is served by
+    connection.get_engine(), which also handles credential hot-swaps.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = OrderedDict()
+        self._build_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_engines(self) -> int:
+        return max(int(get_env('DB_ENGINE_CACHE_SIZE', DEFAULT_ENGINE_CACHE_SIZE)), 1)
+
+    @property
+    def idle_timeout(self) -> float:
+        return float(get_env('DB_ENGINE_IDLE_TIMEOUT', DEFAULT_ENGINE_IDLE_TIMEOUT))
+
+    def _lookup(self, key):
+        entry = self._engines.get(key)
+        if entry is not None:
+            self._engines.move_to_end(key)
+            entry.last_used = time.monotonic()
+        return entry
+
+    def get(self, config) -> EngineEntry:
+        """Return the engine entry for this config, building it on first use."""
+        key = engine_key(config)
+        self.evict_idle()
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # One build per key; concurrent callers for the same database wait for it
+        with build_lock:
+            with self._lock:
+                entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            print(f"[DB-REGISTRY] Creating engine for database {config['database']}")
+            entry = EngineEntry(create_db_engine(config))
+            with self._lock:
+                self._engines[key] = entry
+                self._build_locks.pop(key, None)
+                evicted = []
+                while len(self._engines) > self.max_engines:
+                    evicted.append(self._engines.popitem(last=False))
+            self._dispose(evicted)
+            return entry
+
+    def evict_idle(self):
+        """Dispose engines that have not been used within the idle timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [(key, entry) for key, entry in self._engines.items() if entry.last_used < cutoff]
+            for key, _ in idle:
+                del self._engines[key]
+        self._dispose(idle)
+
+    def _dispose(self, entries):
+        for key, entry in entries:
+            # Idle connections close now; checked-out ones close when returned
+            print(f"[DB-REGISTRY] Disposing engine for database {key[2]}")
+            entry.engine.dispose()
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._engines.items())
+            self._engines.clear()
+        self._dispose(entries)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "max_engines": self.max_engines,
+                "idle_timeout_seconds": self.idle_timeout,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "engines": [
+                    {
+                        "server": key[0],
+                        "database": key[2],
+                        "idle_seconds": round(now - entry.last_used, 1),
+                        "pool": entry.engine.pool.stats.snapshot(entry.engine.pool),
+                    }
+                    for key, entry in self._engines.items()
+                ],
+            }
+
+
+engine_registry = EngineRegistry()
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy import text
+from backend.database.catalog import TableInfo
+from backend.database.connection import get_env, database_key
+from backend.database.filters import compile_filters, prefix_filter
+from backend.database.query_builder import QueryBuildError, column_identifier, facet_query, is_lob
+from backend.database.row_counts import estimate_row_count
+from backend.database.write_events import register_write_listener
+
+# Values fetched (and cached) per facet; requests ask for up to this many
+MAX_FACET_VALUES = 100
+
+# Default cache lifetime (seconds) and size (facets kept)
+DEFAULT_FACET_CACHE_TTL = 300
+DEFAULT_FACET_CACHE_SIZE = 1000
+
+# Tables estimated above this many rows are sampled instead of scanned,
+# reading roughly FACET_SAMPLE_ROWS rows
+DEFAULT_FACET_SAMPLE_THRESHOLD = 1_000_000
+DEFAULT_FACET_SAMPLE_ROWS = 100_000
+
+
+class FacetCache:
+    """
+    LRU of facet results (the most frequent values of a column, optionally
+    under a prefix) keyed by database, table, column and prefix. A table's
+    entries are dropped when a write to it is reported through write_events;
+    entries also expire after FACET_CACHE_TTL seconds for writes made
+    outside this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped on every write so a facet read before the write is never stored after it
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        return float(get_env('FACET_CACHE_TTL', DEFAULT_FACET_CACHE_TTL))
+
+    @property
+    def max_entries(self) -> int:
+        return int(get_env('FACET_CACHE_SIZE', DEFAULT_FACET_CACHE_SIZE))
+
+    def generation(self, table_name: str) -> tuple:
+        with self._lock:
+            return (self._epoch, self._generations.get(table_name, 0))
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, table_name: str, facet: Dict[str, Any], generation: tuple):
+        with self._lock:
+            if (self._epoch, self._generations.get(table_name, 0)) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, table_name, facet)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, table_name: str = None):
+        """Drop the cached facets of one table (or all of them)."""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                self._epoch += 1
+                return
+            for key in [k for k, entry in self._entries.items() if entry[1] == table_name]:
+                del self._entries[key]
+            self._generations[table_name] = self._generations.get(table_name, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+facet_cache = FacetCache()
+register_write_listener(facet_cache.invalidate)
+
+
+def load_facet(connection, table: TableInfo, column: str, prefix: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The MAX_FACET_VALUES most frequent values of a column (optionally only
+    those starting with `prefix`) with their counts, from one GROUP BY.
+
+    Tables estimated above FACET_SAMPLE_THRESHOLD rows are read through
+    TABLESAMPLE instead, sized to about FACET_SAMPLE_ROWS rows, and the
+    counts are scaled up: the result is then an estimate ("sampled": true).
+    """
+    column_identifier(table, column, "facet column")
+    info = table.column(column)
+    if is_lob(info):
+        raise QueryBuildError(f"Column '{column}' ({info.type}) is a large object column and has no facets")
+    clauses, params = [], {}
+    if prefix:
+        clauses, params = compile_filters(table, [prefix_filter(info, prefix)])
+
+    total = estimate_row_count(connection, table.name)
+    threshold = int(get_env('FACET_SAMPLE_THRESHOLD', DEFAULT_FACET_SAMPLE_THRESHOLD))
+    sampled = total is not None and total > threshold
+    scale = 1.0
+    if sampled:
+        sample_rows = int(get_env('FACET_SAMPLE_ROWS', DEFAULT_FACET_SAMPLE_ROWS))
+        percent = max(min(100.0 * sample_rows / total, 100.0), 0.001)
+        params["sample_percent"] = percent
+        scale = 100.0 / percent
+
+    params["limit"] = MAX_FACET_VALUES
+    rows = connection.execute(text(facet_query(table, column, clauses, sampled)), params).fetchall()
+    return {
+        "values": [{"value": row.value, "count": round(row.value_count * scale)} for row in rows],
+        "sampled": sampled,
+        "estimated_rows": total,
+    }
+
+
+def get_facet(connection, table: TableInfo, column: str, prefix: Optional[str] = None) -> Dict[str, Any]:
+    """load_facet() through the facet cache."""
+    key = (database_key(connection), table.name, column, prefix or "")
+    facet = facet_cache.get(key)
+    if facet is None:
+        generation = facet_cache.generation(table.name)
+        facet = load_facet(connection, table, column, prefix)
+        facet_cache.put(key, table.name, facet, generation)
+    return facet
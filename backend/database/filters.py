@@ -0,0 +1,231 @@
+import datetime
+import decimal
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from backend.database.catalog import ColumnInfo, TableInfo
+from backend.database.pagination import quote_identifier
+from backend.database.query_builder import QueryBuildError, column_identifier, contains_filter, parameter, projection
+
+# Filter expressions on /data/{table_name}, one per `filter` query parameter:
+#
+#   city:eq:Berlin            city = 'Berlin'
+#   id:in:3,5,8               id IN (3, 5, 8)
+#   amount:range:10,100       amount >= 10 AND amount <= 100 (either end may be empty)
+#   name:prefix:Mc            name LIKE 'Mc%'
+#   email:isnull              email IS NULL
+#   email:notnull             email IS NOT NULL
+#
+# Values are parsed according to the column's SQL Server type and bound as
+# parameters typed to match the column, so every predicate can use an index
+# seek (no implicit conversion of the column, no leading wildcard).
+
+FILTER_OPERATORS = ("eq", "in", "range", "prefix", "isnull", "notnull")
+
+# Longest IN list accepted; lists are padded to the next power of two so
+# only a handful of statement shapes (and cached plans) exist per column
+MAX_IN_VALUES = 128
+
+_INTEGER_RANGES = {
+    "tinyint": (0, 255),
+    "smallint": (-2 ** 15, 2 ** 15 - 1),
+    "int": (-2 ** 31, 2 ** 31 - 1),
+    "bigint": (-2 ** 63, 2 ** 63 - 1),
+}
+_DECIMAL_TYPES = {"decimal", "numeric", "money", "smallmoney"}
+_FLOAT_TYPES = {"float", "real"}
+_DATETIME_TYPES = {"datetime", "datetime2", "smalldatetime", "datetimeoffset"}
+_ANSI_STRING_TYPES = {"char", "varchar"}
+_STRING_TYPES = _ANSI_STRING_TYPES | {"nchar", "nvarchar"}
+_UNICODE_STRING_TYPES = {"nchar", "nvarchar"}
+_UNORDERED_TYPES = {"bit", "uniqueidentifier"}
+
+
+@dataclass
+class Filter:
+    column: str
+    op: str
+    values: List[Any]
+
+
+def parse_value(column: ColumnInfo, raw: str) -> Any:
+    """Convert a filter value from the query string to the column's Python type."""
+    type_name = column.type_name.lower()
+    try:
+        if type_name in _INTEGER_RANGES:
+            value = int(raw)
+            low, high = _INTEGER_RANGES[type_name]
+            if not low <= value <= high:
+                raise ValueError("out of range")
+            return value
+        if type_name in _DECIMAL_TYPES:
+            value = decimal.Decimal(raw)
+            if not value.is_finite():
+                raise ValueError("not a number")
+            return value
+        if type_name in _FLOAT_TYPES:
+            return float(raw)
+        if type_name == "bit":
+            if raw.lower() in ("1", "true"):
+                return True
+            if raw.lower() in ("0", "false"):
+                return False
+            raise ValueError("expected true or false")
+        if type_name == "date":
+            return datetime.date.fromisoformat(raw)
+        if type_name in _DATETIME_TYPES:
+            return datetime.datetime.fromisoformat(raw)
+        if type_name == "time":
+            return datetime.time.fromisoformat(raw)
+        if type_name == "uniqueidentifier":
+            return str(uuid.UUID(raw))
+        if type_name in _STRING_TYPES:
+            length = column.max_length // 2 if type_name in _UNICODE_STRING_TYPES else column.max_length
+            if column.max_length != -1 and len(raw) > length:
+                raise ValueError(f"longer than {length} characters")
+            return raw
+    except (ValueError, decimal.InvalidOperation) as e:
+        raise QueryBuildError(f"Invalid value '{raw}' for column '{column.name}' ({column.type}): {e}")
+    raise QueryBuildError(f"Column '{column.name}' ({column.type}) can only be filtered with isnull/notnull")
+
+
+def prefix_filter(column: ColumnInfo, raw: str) -> Filter:
+    """A `prefix` filter on a character column."""
+    if column.type_name.lower() not in _STRING_TYPES:
+        raise QueryBuildError(f"Filter operator 'prefix' needs a character column, '{column.name}' is {column.type}")
+    return Filter(column.name, "prefix", [parse_value(column, raw)])
+
+
+def parse_filter(table: TableInfo, expression: str) -> Filter:
+    """Parse one `column:op[:value]` expression, checking the value(s) against the column type."""
+    parts = expression.split(":", 2)
+    if len(parts) < 2:
+        raise QueryBuildError(f"Invalid filter '{expression}', expected column:op[:value]")
+    name, op = parts[0], parts[1].lower()
+    raw = parts[2] if len(parts) == 3 else None
+    column_identifier(table, name, "filter column")
+    column = table.column(name)
+    type_name = column.type_name.lower()
+
+    if op not in FILTER_OPERATORS:
+        raise QueryBuildError(f"Unknown filter operator '{op}', expected one of {', '.join(FILTER_OPERATORS)}")
+    if op in ("isnull", "notnull"):
+        if raw is not None:
+            raise QueryBuildError(f"Filter operator '{op}' takes no value")
+        return Filter(name, op, [])
+    if raw is None:
+        raise QueryBuildError(f"Filter operator '{op}' needs a value")
+
+    if op == "eq":
+        return Filter(name, op, [parse_value(column, raw)])
+    if op == "in":
+        items = raw.split(",")
+        if len(items) > MAX_IN_VALUES:
+            raise QueryBuildError(f"At most {MAX_IN_VALUES} values are allowed in an 'in' filter")
+        return Filter(name, op, [parse_value(column, item) for item in items])
+    if op == "prefix":
+        return prefix_filter(column, raw)
+    # range
+    if type_name in _UNORDERED_TYPES:
+        raise QueryBuildError(f"Filter operator 'range' is not supported for {column.type} column '{name}'")
+    bounds = raw.split(",")
+    if len(bounds) != 2 or not any(bounds):
+        raise QueryBuildError(f"Invalid range '{raw}', expected low,high (either may be empty)")
+    return Filter(name, op, [parse_value(column, bound) if bound else None for bound in bounds])
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so a prefix matches literally."""
+    return value.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]")
+
+
+def compile_filters(table: TableInfo, filters: List[Filter]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Compile parsed filters to WHERE clauses and their parameters. Filters are
+    emitted in catalog column order and parameters are named by position, so
+    the same set of filters always produces the same statement text.
+    """
+    positions = {name: index for index, name in enumerate(table.column_names)}
+    ordered = sorted(filters, key=lambda f: (positions[f.column], FILTER_OPERATORS.index(f.op)))
+    clauses = []
+    params: Dict[str, Any] = {}
+    for index, item in enumerate(ordered):
+        column = table.column(item.column)
+        identifier = quote_identifier(item.column)
+        name = f"f{index}"
+        if item.op == "isnull":
+            clauses.append(f"{identifier} IS NULL")
+        elif item.op == "notnull":
+            clauses.append(f"{identifier} IS NOT NULL")
+        elif item.op == "eq":
+            clauses.append(f"{identifier} = {parameter(column, name)}")
+            params[name] = item.values[0]
+        elif item.op == "in":
+            values = list(item.values)
+            size = 1
+            while size < len(values):
+                size *= 2
+            values += [values[-1]] * (size - len(values))
+            names = [f"{name}_{i}" for i in range(size)]
+            clauses.append(f"{identifier} IN ({', '.join(parameter(column, n) for n in names)})")
+            params.update(zip(names, values))
+        elif item.op == "prefix":
+            # The escaped pattern can be longer than the column, so an ANSI
+            # column's pattern is cast to the widest type rather than its length
+            pattern = f":{name}"
+            if column.type_name.lower() in _ANSI_STRING_TYPES:
+                pattern = f"CAST(:{name} AS VARCHAR({'max' if column.max_length == -1 else 8000}))"
+            clauses.append(f"{identifier} LIKE {pattern}")
+            params[name] = _escape_like(item.values[0]) + "%"
+        else:
+            low, high = item.values
+            if low is not None:
+                clauses.append(f"{identifier} >= {parameter(column, name + '_lo')}")
+                params[name + "_lo"] = low
+            if high is not None:
+                clauses.append(f"{identifier} <= {parameter(column, name + '_hi')}")
+                params[name + "_hi"] = high
+    return clauses, params
+
+
+def parse_order_by(table: TableInfo, spec: Optional[str]) -> Tuple[List[str], List[str]]:
+    """
+    Parse a comma-separated sort key such as "name,-created_at" ('-' sorts
+    that column descending). Returns the columns and the descending ones.
+    """
+    columns, descending = [], []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name = item[1:].strip() if item.startswith("-") else item
+        column_identifier(table, name, "order_by column")
+        if name in columns:
+            raise QueryBuildError(f"Column '{name}' appears more than once in order_by")
+        columns.append(name)
+        if item.startswith("-"):
+            descending.append(name)
+    return columns, descending
+
+
+def parse_columns(table: TableInfo, spec: Optional[str], required: List[str] = ()) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `columns` projection. The `required` columns (the
+    primary key, the sort key) are always added; None means every column.
+    """
+    names = [name.strip() for name in (spec or "").split(",") if name.strip()]
+    return projection(table, names, required) if names else None
+
+
+def build_filters(table: TableInfo, expressions: Optional[List[str]] = None, filter_column: Optional[str] = None,
+                  filter_value: Optional[str] = None) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    WHERE clauses and parameters for a request: the `filter` expressions plus
+    the older single filter_column/filter_value substring search.
+    """
+    clauses, params = compile_filters(table, [parse_filter(table, expression) for expression in expressions or []])
+    if filter_column and filter_value:
+        clause, contains_params = contains_filter(table, filter_column, filter_value)
+        clauses.append(clause)
+        params.update(contains_params)
+    return clauses, params
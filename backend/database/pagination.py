@@ -0,0 +1,83 @@
+import base64
+import datetime
+import json
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a SQL Server identifier with brackets."""
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def _cursor_value(value: Any) -> Any:
+    """JSON form of a key value json can't encode; dates and times use ISO 8601 so they parse back."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(key_values: List[Any], direction: str) -> str:
+    """Encode the seek key of a boundary row into an opaque URL-safe cursor."""
+    payload = json.dumps({"k": key_values, "d": direction}, default=_cursor_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_length: int) -> Tuple[List[Any], str]:
+    """
+    Decode a cursor produced by encode_cursor().
+    Raises ValueError if the cursor is malformed or doesn't match the seek key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key_values, direction = payload["k"], payload["d"]
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if direction not in ("next", "prev") or not isinstance(key_values, list) or len(key_values) != key_length:
+        raise ValueError("Cursor does not match the requested sort key")
+    return key_values, direction
+
+
+def build_seek_predicate(key_columns: List[str], key_values: List[Any], direction: str,
+                         descending_columns: Collection[str] = ()) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a row-value comparison for the seek key, expanded into a form SQL
+    Server can use for an index seek:
+        (a > :k0) OR (a = :k0 AND b > :k1) ...
+    "next" seeks rows after the key, "prev" rows before it, in the sort order
+    of each column (columns in descending_columns compare the other way).
+    """
+    params = {f"seek_{i}": value for i, value in enumerate(key_values)}
+    disjuncts = []
+    for i, column in enumerate(key_columns):
+        after = (direction == "next") != (column in descending_columns)
+        terms = [f"{quote_identifier(key_columns[j])} = :seek_{j}" for j in range(i)]
+        terms.append(f"{quote_identifier(column)} {'>' if after else '<'} :seek_{i}")
+        disjuncts.append("(" + " AND ".join(terms) + ")")
+    return "(" + " OR ".join(disjuncts) + ")", params
+
+
+def build_order_by(key_columns: List[str], descending: bool = False, descending_columns: Collection[str] = ()) -> str:
+    """ORDER BY list for the sort key; `descending` reverses the whole order (prev pages)."""
+    return ", ".join(
+        f"{quote_identifier(column)} {'DESC' if (column in descending_columns) != descending else 'ASC'}"
+        for column in key_columns
+    )
+
+
+def keyset_cursors(rows: List[Dict[str, Any]], key_columns: List[str], direction: Optional[str], has_more: bool):
+    """
+    Work out the next/prev cursors for a page fetched in the given direction
+    (None for the first page). Rows must already be in sort-key order.
+    """
+    if not rows:
+        return None, None
+    first_key = [rows[0][column] for column in key_columns]
+    last_key = [rows[-1][column] for column in key_columns]
+    if direction == "prev":
+        next_cursor = encode_cursor(last_key, "next")
+        prev_cursor = encode_cursor(first_key, "prev") if has_more else None
+    else:
+        next_cursor = encode_cursor(last_key, "next") if has_more else None
+        prev_cursor = encode_cursor(first_key, "prev") if direction == "next" else None
+    return next_cursor, prev_cursor
@@ -0,0 +1,138 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Tuple
+from sqlalchemy import text
+from backend.database.connection import get_env, database_key
+from backend.database.write_events import register_write_listener
+
+# Default time-to-live (seconds) of a loaded permission index
+DEFAULT_PERMISSION_CACHE_TTL = 60
+
+# Tables whose contents the index is built from; a write to any of them
+# (e.g. through the data entry endpoints) drops the index
+PERMISSION_TABLES = ("tables", "user_table_access")
+
+# Every registered table with the users granted access to it, in one pass
+PERMISSIONS_QUERY = text("""
+SELECT t.name AS table_name, uta.user_id
+FROM tables AS t
+LEFT JOIN user_table_access AS uta ON uta.table_id = t.id
+""")
+
+
+@dataclass
+class PermissionSnapshot:
+    """
+    Registered tables and grants. Table names are stored casefolded: the
+    database compares them case-insensitively, so lookups must as well.
+    """
+    tables: FrozenSet[str]
+    access: Dict[int, FrozenSet[str]]
+    loaded_at: float = field(default_factory=time.time)
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name.casefold() in self.tables
+
+    def can_access(self, user_id: int, table_name: str) -> bool:
+        return table_name.casefold() in self.access.get(user_id, ())
+
+
+def load_permissions(connection) -> PermissionSnapshot:
+    tables = set()
+    access: Dict[int, set] = {}
+    for row in connection.execute(PERMISSIONS_QUERY):
+        tables.add(row.table_name.casefold())
+        if row.user_id is not None:
+            access.setdefault(row.user_id, set()).add(row.table_name.casefold())
+    return PermissionSnapshot(
+        tables=frozenset(tables),
+        access={user_id: frozenset(names) for user_id, names in access.items()},
+    )
+
+
+class PermissionIndex:
+    """
+    In-memory index of user_table_access (user id -> set of table names), one
+    per database, so access checks are a set lookup instead of two queries.
+    The routers only consult the default database's index: it holds the
+    users and grants for every database a request can select.
+
+    The index is rebuilt with a single query when it is older than
+    PERMISSION_CACHE_TTL seconds, and dropped as soon as a write to the
+    `tables` or `user_table_access` table is reported through write_events.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # database key -> (snapshot, expires_at)
+        self._snapshots: Dict[str, Tuple[PermissionSnapshot, float]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.last_refresh_seconds = None
+
+    @property
+    def ttl(self) -> float:
+        try:
+            return float(get_env('PERMISSION_CACHE_TTL', DEFAULT_PERMISSION_CACHE_TTL))
+        except (TypeError, ValueError):
+            return float(DEFAULT_PERMISSION_CACHE_TTL)
+
+    def _current(self, key: str):
+        entry = self._snapshots.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def get(self, bind) -> PermissionSnapshot:
+        """Return the permission snapshot of bind's database, rebuilding it if expired."""
+        key = database_key(bind)
+        with self._lock:
+            snapshot = self._current(key)
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                snapshot = self._current(key)
+            if snapshot is not None:
+                return snapshot
+            start = time.perf_counter()
+            with bind.connect() as connection:
+                snapshot = load_permissions(connection)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._snapshots[key] = (snapshot, time.monotonic() + self.ttl)
+                self.refreshes += 1
+                self.last_refresh_seconds = round(elapsed, 4)
+            print(f"[PERMISSIONS] Loaded access for {len(snapshot.access)} users on {len(snapshot.tables)} tables")
+            return snapshot
+
+    def invalidate(self, table_name: str = None):
+        """Drop every index (all databases) if table_name is one the index is built from."""
+        if table_name is not None and table_name.lower() not in PERMISSION_TABLES:
+            return
+        with self._lock:
+            self._snapshots.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "databases": {
+                    key: {"users": len(snapshot.access), "tables": len(snapshot.tables)}
+                    for key, (snapshot, _) in self._snapshots.items()
+                },
+                "hits": self.hits,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "last_refresh_seconds": self.last_refresh_seconds,
+            }
+
+
+permission_index = PermissionIndex()
+register_write_listener(permission_index.invalidate)
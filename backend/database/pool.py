@@ -0,0 +1,134 @@
+import threading
+import time
+import weakref
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from backend.database.connection import get_env
+
+# Azure SQL drops connections idle for 30 minutes; recycle a bit earlier
+DEFAULT_POOL_SETTINGS = {
+    "DB_POOL_SIZE": "5",
+    "DB_MAX_OVERFLOW": "10",
+    "DB_POOL_TIMEOUT": "30",
+    "DB_POOL_RECYCLE": "1500",
+    "DB_POOL_PRE_PING": "true",
+}
+
+
+def get_pool_settings():
+    """Pool parameters from override settings or the environment."""
+    value = lambda key: get_env(key, DEFAULT_POOL_SETTINGS[key])
+    return {
+        "pool_size": int(value("DB_POOL_SIZE")),
+        "max_overflow": int(value("DB_MAX_OVERFLOW")),
+        "pool_timeout": float(value("DB_POOL_TIMEOUT")),
+        "pool_recycle": int(value("DB_POOL_RECYCLE")),
+        "pool_pre_ping": str(value("DB_POOL_PRE_PING")).lower() in ["true", "1", "yes"],
+    }
+
+
+class PoolStats:
+    """Counters describing how a connection pool has been used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reconnects = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            stats = {
+                "connects": self.connects,
+                "reconnects": self.reconnects,
+                "invalidations": self.invalidations,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_total_seconds": round(self.wait_total, 6),
+                "wait_avg_seconds": round(self.wait_total / self.waits, 6) if self.waits else 0.0,
+                "wait_max_seconds": round(self.wait_max, 6),
+            }
+        if pool is not None:
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "status": pool.status(),
+            })
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return record
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def instrument_pool(pool):
+    """
+    Attach event listeners that keep pool.stats up to date. A record that
+    connects a second time was recycled, invalidated or failed a pre-ping.
+    """
+    connected_records = weakref.WeakSet()
+    stats = pool.stats
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        if connection_record in connected_records:
+            stats.increment("reconnects")
+        else:
+            connected_records.add(connection_record)
+            stats.increment("connects")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.increment("checkouts")
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.increment("checkins")
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.increment("invalidations")
+
+    return pool
@@ -0,0 +1,241 @@
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple
+from backend.database.catalog import ColumnInfo, TableInfo
+from backend.database.pagination import quote_identifier, build_order_by
+
+# The statements the routers run against a table (reads, counts, exports and
+# single-row edits) come from this module. Identifiers are checked against
+# the cached catalog and always quoted; every value is a bound parameter, so
+# SQL Server sees one statement text (and caches one plan) per shape, however
+# many search terms, pages or ids are requested.
+#
+# The set-based write paths in bulk.py (the staging table and its MERGE and
+# DELETE statements, and the batch endpoint's composite-key DML) build their
+# own SQL, following the same rules: quoted identifiers, qmark parameters.
+#
+# Read queries use SQLAlchemy named parameters (:name); the row-level DML
+# used with the raw pyodbc cursor uses qmark (?) placeholders.
+
+
+# Types whose values can be arbitrarily large; the (max) types and xml have
+# sys.columns.max_length = -1
+_LOB_TYPES = {"text", "ntext", "image", "xml"}
+_BINARY_TYPES = {"binary", "varbinary", "image"}
+
+
+class QueryBuildError(ValueError):
+    """An identifier in the request is not part of the table."""
+
+
+def table_source(table: TableInfo, schema: str = "dbo") -> str:
+    """[schema].[table], using the catalog's spelling of the name."""
+    return f"{quote_identifier(schema)}.{quote_identifier(table.name)}"
+
+
+def column_identifier(table: TableInfo, name: str, purpose: str = "column") -> str:
+    if table.column(name) is None:
+        raise QueryBuildError(f"Unknown {purpose} '{name}'")
+    return quote_identifier(name)
+
+
+def ordered_columns(table: TableInfo, names: Iterable[str]) -> List[str]:
+    """
+    Validate column names and return them in catalog order, so the same set
+    of columns always produces the same statement text whatever order the
+    request listed them in.
+    """
+    wanted = set(names)
+    for name in wanted:
+        column_identifier(table, name)
+    return [name for name in table.column_names if name in wanted]
+
+
+def projection(table: TableInfo, columns: Optional[Iterable[str]] = None,
+               required: Iterable[str] = ()) -> Optional[List[str]]:
+    """
+    Columns to select: the requested ones plus `required` (e.g. the primary
+    key), in catalog order. None means every column.
+    """
+    if columns is None:
+        return None
+    return ordered_columns(table, list(columns) + list(required))
+
+
+def is_lob(column: ColumnInfo) -> bool:
+    return column.max_length == -1 or column.type_name.lower() in _LOB_TYPES
+
+
+def is_binary(column: ColumnInfo) -> bool:
+    return column.type_name.lower() in _BINARY_TYPES
+
+
+def lob_columns(table: TableInfo, columns: Optional[List[str]] = None) -> List[str]:
+    """The large object columns among `columns` (default: the whole table)."""
+    names = columns if columns is not None else table.column_names
+    return [name for name in names if is_lob(table.column(name))]
+
+
+def _lob_expression(column: ColumnInfo) -> str:
+    """The column as something SUBSTRING accepts (xml has to be converted to text)."""
+    identifier = quote_identifier(column.name)
+    return f"CAST({identifier} AS NVARCHAR(MAX))" if column.type_name.lower() == "xml" else identifier
+
+
+def select_list(table: TableInfo, columns: Optional[List[str]] = None, lob_preview: bool = False) -> str:
+    """
+    The select list for `columns` (None: every column). With lob_preview,
+    large object columns are cut to the first :preview_length characters
+    (bytes for binary) and their DATALENGTH values follow the regular
+    columns, in the order of lob_columns().
+    """
+    if not lob_preview:
+        return ", ".join(quote_identifier(name) for name in columns) if columns else "*"
+    names = columns if columns is not None else table.column_names
+    items = []
+    for name in names:
+        column = table.column(name)
+        if is_lob(column):
+            items.append(f"SUBSTRING({_lob_expression(column)}, 1, :preview_length) AS {quote_identifier(name)}")
+        else:
+            items.append(quote_identifier(name))
+    items += [f"DATALENGTH({quote_identifier(name)})" for name in lob_columns(table, names)]
+    return ", ".join(items)
+
+
+def parameter(column: ColumnInfo, name: str) -> str:
+    """
+    Placeholder for a value compared with the column. Python strings are sent
+    as NVARCHAR, which would force a conversion of every row of a VARCHAR
+    column (and a scan), so those parameters are cast to the column's type.
+    """
+    if column.type_name.lower() in ("char", "varchar"):
+        length = "max" if column.max_length == -1 else column.max_length
+        return f"CAST(:{name} AS VARCHAR({length}))"
+    return f":{name}"
+
+
+def where_sql(clauses: List[str]) -> str:
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+def contains_filter(table: TableInfo, column: str, value: str) -> Tuple[str, Dict[str, Any]]:
+    """Substring filter (column LIKE %value%), with the pattern bound as a parameter."""
+    return (
+        f"{column_identifier(table, column, 'filter column')} LIKE :filter_value",
+        {"filter_value": f"%{value}%"},
+    )
+
+
+def count_query(table: TableInfo, clauses: List[str]) -> str:
+    return f"SELECT COUNT(*) AS total FROM {table_source(table)}{where_sql(clauses)}"
+
+
+def offset_page_query(table: TableInfo, clauses: List[str], order_keys: List[str],
+                      descending_columns: Collection[str] = (), columns: Optional[List[str]] = None,
+                      lob_preview: bool = False) -> str:
+    """
+    One page with OFFSET/FETCH; bind page_params(). Without a sort key the
+    order is unspecified (ORDER BY (SELECT NULL)), as SQL Server requires one.
+    """
+    order_clause = build_order_by(order_keys, descending_columns=descending_columns) if order_keys else "(SELECT NULL)"
+    return (
+        f"SELECT {select_list(table, columns, lob_preview)} FROM {table_source(table)}{where_sql(clauses)}"
+        f" ORDER BY {order_clause} OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+    )
+
+
+def page_params(page: int, page_size: int) -> Dict[str, int]:
+    return {"offset": (page - 1) * page_size, "limit": page_size}
+
+
+def keyset_page_query(table: TableInfo, clauses: List[str], order_keys: List[str], descending: bool = False,
+                      descending_columns: Collection[str] = (), columns: Optional[List[str]] = None,
+                      lob_preview: bool = False) -> str:
+    """TOP (:limit) rows in sort-key order, for keyset (seek) pagination."""
+    return (
+        f"SELECT TOP (:limit) {select_list(table, columns, lob_preview)} FROM {table_source(table)}{where_sql(clauses)}"
+        f" ORDER BY {build_order_by(order_keys, descending=descending, descending_columns=descending_columns)}"
+    )
+
+
+def select_query(table: TableInfo, clauses: List[str], order_keys: List[str],
+                 descending_columns: Collection[str] = (), columns: Optional[List[str]] = None) -> str:
+    """All matching rows, ordered by the sort key if there is one (exports)."""
+    query = f"SELECT {select_list(table, columns)} FROM {table_source(table)}{where_sql(clauses)}"
+    if order_keys:
+        query += " ORDER BY " + build_order_by(order_keys, descending_columns=descending_columns)
+    return query
+
+
+def facet_query(table: TableInfo, column: str, clauses: List[str], sampled: bool = False) -> str:
+    """
+    The TOP (:limit) most frequent values of a column with their counts. With
+    `sampled`, only about :sample_percent percent of the table's pages are read
+    (the same pages every time while the table doesn't change).
+    """
+    identifier = column_identifier(table, column, "facet column")
+    sample = " TABLESAMPLE SYSTEM (:sample_percent PERCENT) REPEATABLE (1)" if sampled else ""
+    return (
+        f"SELECT TOP (:limit) {identifier} AS value, COUNT_BIG(*) AS value_count"
+        f" FROM {table_source(table)}{sample}{where_sql(clauses)}"
+        f" GROUP BY {identifier} ORDER BY COUNT_BIG(*) DESC, {identifier} ASC"
+    )
+
+
+def key_column(table: TableInfo, pk: Optional[str] = None) -> Optional[str]:
+    """The column identifying a row: the requested `pk` (validated) or the first primary key column."""
+    if pk:
+        column_identifier(table, pk, "primary key column")
+        return pk
+    return table.primary_key[0] if table.primary_key else None
+
+
+def update_by_key(table: TableInfo, columns: Iterable[str], key: str) -> Tuple[str, List[str]]:
+    """
+    UPDATE ... SET col = ? ... WHERE key = ?. Returns the statement and the
+    column order its SET values must be bound in (key value last).
+    """
+    names = ordered_columns(table, columns)
+    if not names:
+        raise QueryBuildError("No columns to update")
+    set_clause = ", ".join(f"{quote_identifier(name)} = ?" for name in names)
+    sql = f"UPDATE {table_source(table)} SET {set_clause} WHERE {column_identifier(table, key)} = ?"
+    return sql, names
+
+
+def insert_row(table: TableInfo, columns: Iterable[str], output_column: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    INSERT of one row, optionally returning a column of the inserted row.
+    Returns the statement and the column order its values must be bound in.
+    """
+    names = ordered_columns(table, columns)
+    output = f" OUTPUT INSERTED.{column_identifier(table, output_column)}" if output_column else ""
+    if not names:
+        return f"INSERT INTO {table_source(table)}{output} DEFAULT VALUES", names
+    column_list = ", ".join(quote_identifier(name) for name in names)
+    placeholders = ", ".join("?" for _ in names)
+    return f"INSERT INTO {table_source(table)} ({column_list}){output} VALUES ({placeholders})", names
+
+
+def delete_by_key(table: TableInfo, key: str) -> str:
+    return f"DELETE FROM {table_source(table)} WHERE {column_identifier(table, key)} = ?"
+
+
+def is_unicode_text(column: ColumnInfo) -> bool:
+    return column.type_name.lower() in ("nchar", "nvarchar", "ntext", "xml")
+
+
+def lob_chunk_query(table: TableInfo, column: str, key: str) -> str:
+    """
+    DATALENGTH of one row's value and the slice of :length units starting at
+    :start, for streaming it in pieces. Unicode text (and xml) is read as
+    its UTF-16 bytes so a slice never splits a character in two; units are
+    bytes except for ANSI text, where SUBSTRING counts characters.
+    """
+    info = table.column(column)
+    expression = column_identifier(table, column)
+    if is_unicode_text(info):
+        expression = f"CAST(CAST({expression} AS NVARCHAR(MAX)) AS VARBINARY(MAX))"
+    return (
+        f"SELECT DATALENGTH({expression}) AS length, SUBSTRING({expression}, :start, :length) AS chunk"
+        f" FROM {table_source(table)} WHERE {column_identifier(table, key)} = {parameter(table.column(key), 'key')}"
+    )
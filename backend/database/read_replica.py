@@ -0,0 +1,183 @@
+import threading
+import time
+from typing import Dict
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from backend.app.auth.token import get_current_user
+from backend.database.connection import (
+    get_env, get_db, get_connection_config, create_db_engine,
+    get_requested_database, settings_ready
+)
+
+# Seconds a user's reads stay on the primary after one of their writes
+DEFAULT_READ_YOUR_WRITES_SECONDS = 5
+# Seconds to keep using the primary after the replica could not be reached
+DEFAULT_REPLICA_RETRY_SECONDS = 30
+
+_lock = threading.Lock()
+_read_engine = None
+_ReadSessionLocal = None
+_down_until = 0.0
+# Whether the next replica read should check the replica is reachable first:
+# set for a new engine and after a failure, cleared once a check succeeds
+_probe_pending = True
+_pins: Dict[object, float] = {}
+_stats = {"replica_reads": 0, "primary_reads": 0, "pinned_reads": 0, "fallbacks": 0}
+
+
+def replica_enabled() -> bool:
+    """
+    A read replica is used when SQL_READ_REPLICA is true (same server with
+    ApplicationIntent=ReadOnly, i.e. the Azure SQL read scale-out replica)
+    or when a separate SQL_READ_REPLICA_ENDPOINT is configured.
+    """
+    return (str(get_env('SQL_READ_REPLICA', 'false')).lower() in ["true", "1", "yes"]
+            or bool(get_env('SQL_READ_REPLICA_ENDPOINT')))
+
+
+def get_read_engine():
+    global _read_engine, _ReadSessionLocal
+    engine = _read_engine
+    if engine is not None:
+        return engine
+    with _lock:
+        if _read_engine is None:
+            config = get_connection_config()
+            primary_key = f"{config['server']}/{config['database']}"
+            config["server"] = get_env('SQL_READ_REPLICA_ENDPOINT') or config["server"]
+            config["read_only"] = True
+            engine = create_db_engine(config)
+            # The replica can lag behind the primary, so results read from it
+            # (pages, counts, facets) are cached apart from the primary's
+            engine.database_key = f"{primary_key}#replica"
+            engine.read_replica = True
+            event.listen(engine, "handle_error", _on_replica_error)
+            _ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            _read_engine = engine
+        return _read_engine
+
+
+def reset_read_engine():
+    """Dispose the replica engine, e.g. after the credentials changed."""
+    global _read_engine, _ReadSessionLocal, _down_until, _probe_pending
+    with _lock:
+        engine = _read_engine
+        _read_engine = None
+        _ReadSessionLocal = None
+        _down_until = 0.0
+        _probe_pending = True
+    if engine is not None:
+        engine.dispose()
+
+
+def pin_to_primary(user_id):
+    """Send this user's reads to the primary for a few seconds (read your writes)."""
+    seconds = float(get_env('READ_YOUR_WRITES_SECONDS', DEFAULT_READ_YOUR_WRITES_SECONDS))
+    now = time.monotonic()
+    with _lock:
+        _pins[user_id] = now + seconds
+        # Drop expired pins so the map doesn't grow with every user ever seen
+        for key in [k for k, expires in _pins.items() if expires <= now]:
+            del _pins[key]
+
+
+def _is_pinned(user_id) -> bool:
+    with _lock:
+        expires = _pins.get(user_id)
+        return expires is not None and expires > time.monotonic()
+
+
+def _count(counter: str):
+    with _lock:
+        _stats[counter] += 1
+
+
+def _mark_down(error):
+    global _down_until, _probe_pending
+    seconds = float(get_env('READ_REPLICA_RETRY_SECONDS', DEFAULT_REPLICA_RETRY_SECONDS))
+    print(f"[DB-REPLICA] Read replica unavailable, using primary for {seconds:.0f}s: {error}")
+    with _lock:
+        _down_until = time.monotonic() + seconds
+        _probe_pending = True
+        _stats["fallbacks"] += 1
+
+
+def _on_replica_error(context):
+    """
+    Replica engine errors: a failed connect or a lost connection (not a
+    stale pooled one caught by pre-ping) sends reads to the primary.
+    """
+    if context.is_pre_ping:
+        return
+    if context.connection is None or context.is_disconnect:
+        _mark_down(context.original_exception)
+
+
+def _probe(engine) -> bool:
+    """Check the replica is reachable, only while it is new or recovering."""
+    global _probe_pending
+    if not _probe_pending:
+        return True
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        _mark_down(e)
+        return False
+    with _lock:
+        _probe_pending = False
+    return True
+
+
+def get_read_db(request: Request = None, current_user: dict = Depends(get_current_user)):
+    """
+    Session for read-only handlers. Uses the read replica when one is
+    configured, and the primary when:
+    - the request targets another database (X-Database)
+    - the user wrote something in the last READ_YOUR_WRITES_SECONDS
+    - the replica failed within the last READ_REPLICA_RETRY_SECONDS
+
+    Failures are noticed as they happen on replica connections; only the
+    first read on a new engine, or after the retry window, connects up
+    front to check the replica is back.
+    """
+    use_replica = replica_enabled() and settings_ready() and get_requested_database(request) is None
+    if use_replica and current_user is not None and _is_pinned(current_user.get("id")):
+        _count("pinned_reads")
+        use_replica = False
+    if use_replica and _down_until > time.monotonic():
+        use_replica = False
+    if use_replica:
+        db = None
+        try:
+            engine = get_read_engine()
+            # The check connection goes straight back to the pool, since
+            # handlers open their own and a second held one could exhaust it
+            if _probe(engine):
+                db = _ReadSessionLocal()
+        except Exception as e:
+            _mark_down(e)
+        if db is not None:
+            _count("replica_reads")
+            try:
+                yield db
+            finally:
+                db.close()
+            return
+    _count("primary_reads")
+    yield from get_db(request)
+
+
+def replica_stats():
+    engine = _read_engine
+    with _lock:
+        stats = {
+            "enabled": replica_enabled(),
+            "down_for_seconds": max(0, round(_down_until - time.monotonic(), 1)),
+            "pinned_users": sum(1 for expires in _pins.values() if expires > time.monotonic()),
+            **_stats,
+        }
+    if engine is not None:
+        stats["pool"] = engine.pool.stats.snapshot(engine.pool)
+    return stats
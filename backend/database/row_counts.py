@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import text
+from backend.database.connection import get_env, database_key
+from backend.database.pagination import quote_identifier
+from backend.database.write_events import register_write_listener
+
+COUNT_MODES = ("exact", "estimated", "none")
+
+# Default time-to-live (seconds) for cached exact counts
+DEFAULT_COUNT_CACHE_TTL = 30
+# Default number of cached counts (filtered counts are keyed by their filter values)
+DEFAULT_COUNT_CACHE_SIZE = 1000
+
+# Row count of the heap or clustered index, read from partition metadata
+PARTITION_STATS_QUERY = text("""
+SELECT SUM(ps.row_count)
+FROM sys.dm_db_partition_stats AS ps
+WHERE ps.object_id = OBJECT_ID(:object_name) AND ps.index_id IN (0, 1)
+""")
+
+# Same estimate from sys.partitions, readable without VIEW DATABASE STATE
+PARTITIONS_QUERY = text("""
+SELECT SUM(p.rows)
+FROM sys.partitions AS p
+WHERE p.object_id = OBJECT_ID(:object_name) AND p.index_id IN (0, 1)
+""")
+
+
+class CountCache:
+    """
+    Short-lived LRU of exact COUNT(*) results keyed by table, database, query
+    text and parameters. Entries for a table are dropped (in every database)
+    as soon as a write to it is reported through write_events; expired
+    entries are pruned on access and the cache keeps at most COUNT_CACHE_SIZE.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[float, int]]" = OrderedDict()
+        # Bumped on every write so a count taken before the write is never stored after it
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        try:
+            return float(get_env('COUNT_CACHE_TTL', DEFAULT_COUNT_CACHE_TTL))
+        except (TypeError, ValueError):
+            return float(DEFAULT_COUNT_CACHE_TTL)
+
+    @property
+    def max_entries(self) -> int:
+        try:
+            return int(get_env('COUNT_CACHE_SIZE', DEFAULT_COUNT_CACHE_SIZE))
+        except (TypeError, ValueError):
+            return DEFAULT_COUNT_CACHE_SIZE
+
+    @staticmethod
+    def _key(table_name: str, query: str, params: Dict[str, Any], database: str) -> tuple:
+        return (table_name, database, query, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def generation(self, table_name: str) -> tuple:
+        with self._lock:
+            return (self._epoch, self._generations.get(table_name, 0))
+
+    def _prune(self, now: float):
+        for key in [k for k, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, table_name: str, query: str, params: Dict[str, Any], database: str = "default") -> Optional[int]:
+        key = self._key(table_name, query, params, database)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, table_name: str, query: str, params: Dict[str, Any], total: int, generation: tuple,
+            database: str = "default"):
+        with self._lock:
+            if (self._epoch, self._generations.get(table_name, 0)) != generation:
+                return
+            now = time.monotonic()
+            key = self._key(table_name, query, params, database)
+            self._entries[key] = (now + self.ttl, total)
+            self._entries.move_to_end(key)
+            self._prune(now)
+
+    def invalidate(self, table_name: str = None):
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                self._epoch += 1
+                return
+            for key in [k for k in self._entries if k[0] == table_name]:
+                del self._entries[key]
+            self._generations[table_name] = self._generations.get(table_name, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+count_cache = CountCache()
+register_write_listener(count_cache.invalidate)
+
+
+def estimate_row_count(connection, table_name: str, schema: str = "dbo") -> Optional[int]:
+    """
+    Return the approximate row count of a table from partition metadata,
+    or None if neither catalog view could be read.
+    """
+    object_name = f"{quote_identifier(schema)}.{quote_identifier(table_name)}"
+    for query in (PARTITION_STATS_QUERY, PARTITIONS_QUERY):
+        try:
+            total = connection.execute(query, {"object_name": object_name}).scalar()
+            if total is not None:
+                return int(total)
+        except Exception as e:
+            print(f"[ROW-COUNT] Could not read partition stats for {table_name}: {e}")
+    return None
+
+
+def get_row_count(connection, table_name: str, count_query: str, params: Dict[str, Any],
+                  mode: str = "exact", filtered: bool = False) -> Tuple[Optional[int], str]:
+    """
+    Count the rows matched by count_query using the requested strategy.
+
+    - exact: run COUNT(*), cached for COUNT_CACHE_TTL seconds per query
+    - estimated: read partition statistics; only valid for unfiltered
+      requests, filtered ones fall back to a (cached) exact count
+    - none: skip counting altogether
+
+    Returns the total (None for "none") and the mode that was actually used.
+    """
+    if mode == "none":
+        return None, "none"
+    if mode == "estimated" and not filtered:
+        total = estimate_row_count(connection, table_name)
+        if total is not None:
+            return total, "estimated"
+    database = database_key(connection)
+    total = count_cache.get(table_name, count_query, params, database)
+    if total is None:
+        generation = count_cache.generation(table_name)
+        total = connection.execute(text(count_query), params).scalar() or 0
+        count_cache.put(table_name, count_query, params, total, generation, database)
+    return total, "exact"
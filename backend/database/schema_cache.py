@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from backend.database.connection import get_env, database_key
+from backend.database.catalog import Catalog, ColumnInfo, TableInfo, load_catalog
+
+# Default time-to-live (seconds) for the cached catalog
+DEFAULT_SCHEMA_CACHE_TTL = 300
+
+
+class SchemaCache:
+    """
+    Process-wide cache of table schema metadata (table names, columns,
+    primary keys, identity flags and foreign keys), one catalog per database.
+
+    A database's whole dbo catalog is loaded at once with load_catalog() and
+    kept for SCHEMA_CACHE_TTL seconds. It can be dropped explicitly with invalidate(),
+    e.g. after a DDL change or when the database credentials are switched at
+    runtime.
+    """
+
+    def __init__(self, schema: str = "dbo"):
+        self.schema = schema
+        self._lock = threading.Lock()
+        # database key -> (catalog, expires_at)
+        self._catalogs: Dict[str, Tuple[Catalog, float]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    @property
+    def ttl(self) -> float:
+        try:
+            return float(get_env('SCHEMA_CACHE_TTL', DEFAULT_SCHEMA_CACHE_TTL))
+        except (TypeError, ValueError):
+            return float(DEFAULT_SCHEMA_CACHE_TTL)
+
+    def _current(self, key: str) -> Optional[Catalog]:
+        entry = self._catalogs.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def get_catalog(self, bind) -> Catalog:
+        """Return the cached catalog of bind's database, loading it on first use or after expiry."""
+        key = database_key(bind)
+        with self._lock:
+            catalog = self._current(key)
+            if catalog is not None:
+                self.hits += 1
+                return catalog
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Only one thread reloads a database's catalog; the others wait and reuse its result
+        with load_lock:
+            with self._lock:
+                catalog = self._current(key)
+            if catalog is not None:
+                return catalog
+            with bind.connect() as connection:
+                catalog = load_catalog(connection, self.schema)
+            with self._lock:
+                self._catalogs[key] = (catalog, time.monotonic() + self.ttl)
+                self.loads += 1
+            print(f"[SCHEMA-CACHE] Loaded catalog of {key} with {len(catalog.tables)} tables")
+            return catalog
+
+    def get_table(self, bind, table_name: str) -> Optional[TableInfo]:
+        return self.get_catalog(bind).get(table_name)
+
+    def get_table_names(self, bind) -> List[str]:
+        """Return the list of table names in the schema."""
+        return self.get_catalog(bind).table_names
+
+    def table_exists(self, bind, table_name: str) -> bool:
+        return self.get_table(bind, table_name) is not None
+
+    def get_columns(self, bind, table_name: str) -> List[ColumnInfo]:
+        table = self.get_table(bind, table_name)
+        return table.columns if table else []
+
+    def get_primary_key(self, bind, table_name: str) -> List[str]:
+        """Return the ordered list of primary key column names (empty if none)."""
+        table = self.get_table(bind, table_name)
+        return table.primary_key if table else []
+
+    def is_identity(self, bind, table_name: str, column_name: str) -> bool:
+        """Return True if the column has the IDENTITY property."""
+        table = self.get_table(bind, table_name)
+        column = table.column(column_name) if table else None
+        return bool(column and column.is_identity)
+
+    def invalidate(self, database: Optional[str] = None):
+        """Drop the cached catalog of one database (or all) so the next lookup reloads it."""
+        with self._lock:
+            if database is None:
+                self._catalogs.clear()
+            else:
+                self._catalogs.pop(database, None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "databases": {key: len(catalog.tables) for key, (catalog, _) in self._catalogs.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+            }
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,97 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+from backend.database.connection import database_key
+from backend.database.write_events import register_write_listener
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so formatting differences don't split identical queries."""
+    return " ".join(sql.split())
+
+
+def query_key(bind, table_name: str, *statements: str, params: Dict[str, Any] = None,
+              extra: Hashable = None) -> tuple:
+    """
+    Key identifying a read: the table, the engine it runs on (primary and
+    replica never share), the normalized SQL statements and the bound
+    parameters (repr keeps 1 and '1' apart).
+    """
+    return (
+        table_name,
+        database_key(bind),
+        id(getattr(bind, "engine", bind)),
+        tuple(normalize_sql(statement) for statement in statements),
+        tuple(sorted((name, repr(value)) for name, value in (params or {}).items())),
+        extra,
+    )
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads: the first caller for a key runs the
+    query, callers arriving while it is in flight wait for it and share its
+    result (or its exception). Nothing is kept once the call completes, and
+    a write to a table detaches its in-flight reads, so this only removes
+    duplicate work and never serves data older than the caller's request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self, table_name: str = None):
+        """
+        Stop handing in-flight reads of a table to new callers, e.g. because
+        the table was just written: a caller arriving after the write must
+        not receive a result that was read before it.
+        """
+        with self._lock:
+            for key in [k for k in self._calls if table_name is None or k[0] == table_name]:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+single_flight = SingleFlight()
+register_write_listener(single_flight.forget)
@@ -0,0 +1,28 @@
+import threading
+from typing import Callable, List
+
+# Callbacks invoked with the table name after a committed write to that table
+_listeners: List[Callable[[str], None]] = []
+_lock = threading.Lock()
+
+
+def register_write_listener(callback: Callable[[str], None]):
+    """Register a callback to be told when rows of a table were written."""
+    with _lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+    return callback
+
+
+def notify_table_write(table_name: str):
+    """
+    Tell every registered cache that a table was written to. Listener errors
+    are logged and swallowed so a cache problem never fails a committed write.
+    """
+    with _lock:
+        listeners = list(_listeners)
+    for callback in listeners:
+        try:
+            callback(table_name)
+        except Exception as e:
+            print(f"[WRITE-EVENTS] Listener {callback} failed for table {table_name}: {e}")
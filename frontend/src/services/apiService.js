@@ -74,7 +74,9 @@ export const apiService = {
    * @param {Object} instance - MSAL instance
    * @param {Object} account - User account
    * @param {string} tableName - Name of the table
-   * @param {Object} params - Query parameters (page, page_size, filter_column, filter_value)
+   * @param {Object} params - Query parameters (page, page_size, filter_column, filter_value,
+   *   filters: array of "column:op[:value]" expressions, order_by, columns: array of visible columns,
+   *   lob: 'preview' for truncated large values)
    * @returns {Promise<Object>} Table data with pagination info
    */
   async getTableData(instance, account, tableName, params = {}) {
@@ -85,6 +87,10 @@ export const apiService = {
       if (params.page_size) queryParams.append('page_size', params.page_size);
       if (params.filter_column) queryParams.append('filter_column', params.filter_column);
       if (params.filter_value) queryParams.append('filter_value', params.filter_value);
+      (params.filters || []).forEach(filter => queryParams.append('filter', filter));
+      if (params.order_by) queryParams.append('order_by', params.order_by);
+      if (params.columns && params.columns.length) queryParams.append('columns', params.columns.join(','));
+      if (params.lob) queryParams.append('lob', params.lob);
       
       const queryString = queryParams.toString() ? `?${queryParams.toString()}` : '';
       